@@ -0,0 +1,82 @@
+"""
+Compare two benchmark reports written by ``benchmarks.run``.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 10
+
+Exits with status 1 when a scenario's p95 latency grew by more than
+``--threshold`` percent or when it started running more queries.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _load(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding='utf-8') as file:
+        report = json.load(file)
+    return {result['name']: result for result in report['results']}
+
+
+def _change(before: float, after: float) -> float:
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def compare(
+    baseline: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]],
+    threshold: float,
+) -> Tuple[List[str], List[str]]:
+    """
+    Return the report lines and the regressions found.
+    """
+    lines = [
+        f'{"scenario":<32}{"p95 before":>12}{"p95 after":>12}{"change":>9}'
+        f'{"rps change":>12}{"queries":>12}'
+    ]
+    regressions = []
+
+    for name in baseline.keys() & current.keys():
+        before, after = baseline[name], current[name]
+        p95_change = _change(
+            before['latency_ms']['p95'], after['latency_ms']['p95']
+        )
+        rps_change = _change(before['throughput_rps'], after['throughput_rps'])
+        queries = (
+            f'{before["queries_per_request"]}->{after["queries_per_request"]}'
+        )
+        lines.append(
+            f'{name:<32}{before["latency_ms"]["p95"]:>12}'
+            f'{after["latency_ms"]["p95"]:>12}{p95_change:>8.1f}%'
+            f'{rps_change:>11.1f}%{queries:>12}'
+        )
+
+        if p95_change > threshold:
+            regressions.append(f'{name}: p95 latency +{p95_change:.1f}%')
+        if after['queries_per_request'] > before['queries_per_request']:
+            regressions.append(f'{name}: queries per request {queries}')
+
+    return lines, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    lines, regressions = compare(
+        _load(args.baseline), _load(args.current), args.threshold
+    )
+    print('\n'.join(lines))
+    if regressions:
+        print('\nRegressions:\n' + '\n'.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from fastapi_base.models import (
+    AuditLog,
+    Group,
+    Permission,
+    Role,
+    User,
+    group_roles,
+    role_permissions,
+    table_registry,
+    user_groups,
+    user_permissions,
+    user_roles,
+)
+from fastapi_base.security import get_password_hash
+from tests.seed import (
+    GROUPS_ROLES_TO_CREATE,
+    GROUPS_TO_CREATE,
+    PERMISSIONS_TO_CREATE,
+    ROLES_PERMISSIONS_TO_CREATE,
+    ROLES_TO_CREATE,
+)
+
+BENCH_PASSWORD = 'Bench@12345'
+ADMIN_USERNAME = 'bench-admin'
+ADMIN_EMAIL = 'bench-admin@example.com'
+
+# Keeps multi-row inserts under SQLite's bound parameter limit
+CHUNK_SIZE = 1000
+
+ACTIONS = ('create', 'read', 'update', 'delete', 'list')
+
+
+@dataclass
+class Scale:
+    users: int = 10_000
+    groups: int = 100
+    roles: int = 50
+    permissions: int = 200
+    audit_logs: int = 100_000
+    groups_per_user: int = 2
+    roles_per_user: int = 1
+    roles_per_group: int = 3
+    permissions_per_role: int = 10
+    seed: int = 42
+
+
+@dataclass
+class Dataset:
+    admin_email: str
+    password: str
+    user_ids: List[int]
+    group_ids: List[int]
+    role_ids: List[int]
+    permission_ids: List[int]
+    membership_group_id: int
+
+
+async def _insert(conn, table, rows: List[Dict[str, Any]]) -> None:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        await conn.execute(insert(table), rows[start : start + CHUNK_SIZE])
+
+
+async def _ids(conn, column) -> List[int]:
+    return list((await conn.scalars(select(column).order_by(column))).all())
+
+
+async def seed_benchmark_data(engine: AsyncEngine, scale: Scale) -> Dataset:
+    """
+    Recreate every table and fill it with ``scale`` rows.
+
+    The RBAC data used by the test suite (tests/seed.py) is loaded first
+    and the benchmark admin is added to its administrators group, so
+    authenticated requests go through the regular permission checks.
+    Every user shares the same password hash to keep seeding fast.
+    """
+    rng = random.Random(scale.seed)
+    password_hash = get_password_hash(BENCH_PASSWORD)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+
+        await _insert(conn, Permission.__table__, PERMISSIONS_TO_CREATE)
+        await _insert(conn, Group.__table__, GROUPS_TO_CREATE)
+        await _insert(conn, Role.__table__, ROLES_TO_CREATE)
+
+        names = {
+            'permissions': dict(
+                (await conn.execute(select(Permission.name, Permission.id)))
+                .tuples()
+                .all()
+            ),
+            'groups': dict(
+                (await conn.execute(select(Group.name, Group.id)))
+                .tuples()
+                .all()
+            ),
+            'roles': dict(
+                (await conn.execute(select(Role.name, Role.id))).tuples().all()
+            ),
+        }
+        await _insert(
+            conn,
+            group_roles,
+            [
+                {
+                    'group_id': names['groups'][item['group_name']],
+                    'role_id': names['roles'][role],
+                }
+                for item in GROUPS_ROLES_TO_CREATE
+                for role in item['roles']
+            ],
+        )
+        await _insert(
+            conn,
+            role_permissions,
+            [
+                {
+                    'role_id': names['roles'][item['role_name']],
+                    'permission_id': names['permissions'][permission],
+                }
+                for item in ROLES_PERMISSIONS_TO_CREATE
+                for permission in item['permissions']
+                if permission in names['permissions']
+            ],
+        )
+
+        await _insert(
+            conn,
+            Permission.__table__,
+            [
+                {
+                    'name': f'bench_permission_{n}',
+                    'resource': f'bench_resource_{n // len(ACTIONS)}',
+                    'action': ACTIONS[n % len(ACTIONS)],
+                    'description': None,
+                    'conditions': None,
+                }
+                for n in range(scale.permissions)
+            ],
+        )
+        await _insert(
+            conn,
+            Group.__table__,
+            [
+                {'name': f'bench_group_{n}', 'description': None}
+                for n in range(scale.groups)
+            ],
+        )
+        # Left empty so the membership scenarios never hit existing rows
+        await _insert(
+            conn,
+            Group.__table__,
+            [{'name': 'bench_membership_group', 'description': None}],
+        )
+        await _insert(
+            conn,
+            Role.__table__,
+            [
+                {'name': f'bench_role_{n}', 'description': None}
+                for n in range(scale.roles)
+            ],
+        )
+        await _insert(
+            conn,
+            User.__table__,
+            [
+                {
+                    'username': ADMIN_USERNAME,
+                    'email': ADMIN_EMAIL,
+                    'password': password_hash,
+                    'is_active': True,
+                    'is_superuser': False,
+                }
+            ]
+            + [
+                {
+                    'username': f'bench_user_{n}',
+                    'email': f'bench_user_{n}@example.com',
+                    'password': password_hash,
+                    'is_active': True,
+                    'is_superuser': False,
+                }
+                for n in range(scale.users)
+            ],
+        )
+
+        admin_id = await conn.scalar(
+            select(User.id).where(User.email == ADMIN_EMAIL)
+        )
+        admin_group_id = names['groups'][GROUPS_TO_CREATE[0]['name']]
+        await _insert(
+            conn,
+            user_groups,
+            [{'user_id': admin_id, 'group_id': admin_group_id}],
+        )
+
+        bench_permission_ids = list(
+            (
+                await conn.scalars(
+                    select(Permission.id)
+                    .where(Permission.name.like('bench_%'))
+                    .order_by(Permission.id)
+                )
+            ).all()
+        )
+        group_ids = await _ids(conn, Group.id)
+        role_ids = await _ids(conn, Role.id)
+        membership_group_id = await conn.scalar(
+            select(Group.id).where(Group.name == 'bench_membership_group')
+        )
+        bench_group_ids = [
+            g
+            for g in group_ids
+            if g not in {admin_group_id, membership_group_id}
+        ]
+        bench_role_ids = [
+            r for r in role_ids if r not in names['roles'].values()
+        ]
+        user_ids = [u for u in await _ids(conn, User.id) if u != admin_id]
+
+        def sample(population: List[int], count: int) -> List[int]:
+            return rng.sample(population, min(count, len(population)))
+
+        await _insert(
+            conn,
+            role_permissions,
+            [
+                {'role_id': role_id, 'permission_id': permission_id}
+                for role_id in bench_role_ids
+                for permission_id in sample(
+                    bench_permission_ids, scale.permissions_per_role
+                )
+            ],
+        )
+        await _insert(
+            conn,
+            group_roles,
+            [
+                {'group_id': group_id, 'role_id': role_id}
+                for group_id in bench_group_ids
+                for role_id in sample(bench_role_ids, scale.roles_per_group)
+            ],
+        )
+        await _insert(
+            conn,
+            user_groups,
+            [
+                {'user_id': user_id, 'group_id': group_id}
+                for user_id in user_ids
+                for group_id in sample(bench_group_ids, scale.groups_per_user)
+            ],
+        )
+        await _insert(
+            conn,
+            user_roles,
+            [
+                {'user_id': user_id, 'role_id': role_id}
+                for user_id in user_ids
+                for role_id in sample(bench_role_ids, scale.roles_per_user)
+            ],
+        )
+        await _insert(
+            conn,
+            user_permissions,
+            [
+                {'user_id': user_id, 'permission_id': permission_id}
+                for user_id in user_ids[:: max(len(user_ids) // 100, 1)]
+                for permission_id in sample(bench_permission_ids, 1)
+            ],
+        )
+        await _insert(
+            conn,
+            AuditLog.__table__,
+            [
+                {
+                    'user_id': rng.choice(user_ids) if user_ids else None,
+                    'action': rng.choice(ACTIONS),
+                    'resource_type': 'users',
+                    'resource_id': rng.choice(user_ids) if user_ids else None,
+                    'details': None,
+                    'ip_address': '127.0.0.1',
+                }
+                for _ in range(scale.audit_logs)
+            ],
+        )
+
+    return Dataset(
+        admin_email=ADMIN_EMAIL,
+        password=BENCH_PASSWORD,
+        user_ids=user_ids,
+        group_ids=bench_group_ids,
+        role_ids=bench_role_ids,
+        permission_ids=bench_permission_ids,
+        membership_group_id=membership_group_id,
+    )
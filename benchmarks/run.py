@@ -0,0 +1,312 @@
+"""
+Benchmark the hot API endpoints against a seeded database.
+
+    python -m benchmarks.run --database-url sqlite+aiosqlite:///bench.db \\
+        --users 10000 --requests 500 --concurrency 10 --output bench.json
+
+The target database is dropped and recreated before seeding. Requests go
+through the ASGI app in-process, so no server has to be started; results
+are written as JSON and can be compared with ``python -m benchmarks.compare``.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timezone
+from http import HTTPStatus
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.dataset import Dataset, Scale, seed_benchmark_data
+from fastapi_base.app import app
+from fastapi_base.authorization import authorization_cache
+from fastapi_base.database import (
+    create_engine_from_settings,
+    get_session,
+    instrument_engine,
+    track_queries,
+)
+from fastapi_base.settings import Settings
+
+BATCH_SIZE = 100
+
+
+@dataclass
+class Context:
+    client: AsyncClient
+    headers: Dict[str, str]
+    dataset: Dataset
+
+    def user_id(self, i: int) -> int:
+        return self.dataset.user_ids[i % len(self.dataset.user_ids)]
+
+    def group_id(self, i: int) -> int:
+        return self.dataset.group_ids[i % len(self.dataset.group_ids)]
+
+    def batch(self, i: int) -> List[int]:
+        start = (i * BATCH_SIZE) % len(self.dataset.user_ids)
+        return self.dataset.user_ids[start : start + BATCH_SIZE]
+
+
+Scenario = Callable[[Context, int], Awaitable[Response]]
+
+
+def _token(ctx: Context, i: int):
+    return ctx.client.post(
+        '/auth/token',
+        data={
+            'username': ctx.dataset.admin_email,
+            'password': ctx.dataset.password,
+        },
+    )
+
+
+def _list_users(ctx: Context, i: int):
+    return ctx.client.get('/users/?limit=100', headers=ctx.headers)
+
+
+def _read_group(ctx: Context, i: int):
+    return ctx.client.get(f'/groups/{ctx.group_id(i)}', headers=ctx.headers)
+
+
+def _add_user_to_group(ctx: Context, i: int):
+    return ctx.client.post(
+        f'/groups/{ctx.dataset.membership_group_id}/users/{ctx.user_id(i)}',
+        headers=ctx.headers,
+    )
+
+
+def _remove_user_from_group(ctx: Context, i: int):
+    return ctx.client.delete(
+        f'/groups/{ctx.dataset.membership_group_id}/users/{ctx.user_id(i)}',
+        headers=ctx.headers,
+    )
+
+
+def _add_users_to_group(ctx: Context, i: int):
+    return ctx.client.post(
+        f'/groups/{ctx.dataset.membership_group_id}/users/batch',
+        json={'ids': ctx.batch(i)},
+        headers=ctx.headers,
+    )
+
+
+def _remove_users_from_group(ctx: Context, i: int):
+    return ctx.client.request(
+        'DELETE',
+        f'/groups/{ctx.dataset.membership_group_id}/users/batch',
+        json={'ids': ctx.batch(i)},
+        headers=ctx.headers,
+    )
+
+
+# Run in this order: each removal scenario undoes the additions before it
+SCENARIOS: Dict[str, Scenario] = {
+    'auth_token': _token,
+    'list_users': _list_users,
+    'read_group': _read_group,
+    'add_user_to_group': _add_user_to_group,
+    'remove_user_from_group': _remove_user_from_group,
+    'add_users_to_group_batch': _add_users_to_group,
+    'remove_users_from_group_batch': _remove_users_from_group,
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+
+async def run_scenario(
+    name: str,
+    scenario: Scenario,
+    ctx: Context,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    indexes = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in indexes:
+            start = perf_counter()
+            response = await scenario(ctx, i)
+            latencies.append(perf_counter() - start)
+            if response.status_code >= HTTPStatus.BAD_REQUEST:
+                errors += 1
+
+    start = perf_counter()
+    with track_queries() as stats:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+
+    latencies.sort()
+    return {
+        'name': name,
+        'requests': requests,
+        'errors': errors,
+        'seconds': round(elapsed, 4),
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3),
+        },
+        'queries_per_request': round(stats.count / requests, 2),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(
+    database_url: str,
+    scale: Scale,
+    requests: int = 200,
+    concurrency: int = 10,
+    warmup: int = 5,
+    scenarios: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Seed the database, run every scenario and return the report.
+    """
+    settings = Settings().model_copy(update={'DATABASE_URL': database_url})
+    engine = create_engine_from_settings(settings)
+    dataset = await seed_benchmark_data(engine, scale)
+    instrument_engine(engine)
+
+    async def get_benchmark_session():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_benchmark_session
+    authorization_cache.clear()
+    results = []
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://bench'
+        ) as client:
+            ctx = Context(client=client, headers={}, dataset=dataset)
+            response = await _token(ctx, 0)
+            token = response.json()['access_token']
+            ctx.headers = {'Authorization': f'Bearer {token}'}
+
+            for name in scenarios or SCENARIOS:
+                scenario = SCENARIOS[name]
+                # Warm-up requests use indexes past the measured ones
+                for i in range(requests, requests + warmup):
+                    await scenario(ctx, i)
+                results.append(
+                    await run_scenario(
+                        name, scenario, ctx, requests, concurrency
+                    )
+                )
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        await engine.dispose()
+
+    url = make_url(database_url)
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'database': url.get_backend_name(),
+            'driver': url.get_driver_name(),
+            'requests': requests,
+            'concurrency': concurrency,
+            'warmup': warmup,
+            'scale': asdict(scale),
+        },
+        'results': results,
+    }
+
+
+def _summary(report: Dict[str, Any]) -> str:
+    lines = [
+        f'{"scenario":<32}{"rps":>10}{"p50":>10}{"p95":>10}{"p99":>10}'
+        f'{"queries":>10}{"errors":>8}'
+    ]
+    for result in report['results']:
+        latency = result['latency_ms']
+        lines.append(
+            f'{result["name"]:<32}{result["throughput_rps"]:>10}'
+            f'{latency["p50"]:>10}{latency["p95"]:>10}{latency["p99"]:>10}'
+            f'{result["queries_per_request"]:>10}{result["errors"]:>8}'
+        )
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--database-url', default='sqlite+aiosqlite:///bench.db'
+    )
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument(
+        '--scenario',
+        action='append',
+        choices=list(SCENARIOS),
+        help='Run only this scenario (repeatable)',
+    )
+    parser.add_argument('--output', help='Write the JSON report here')
+    for scale_field in fields(Scale):
+        parser.add_argument(
+            f'--{scale_field.name.replace("_", "-")}',
+            type=int,
+            default=scale_field.default,
+        )
+    args = parser.parse_args(argv)
+
+    scale = Scale(**{f.name: getattr(args, f.name) for f in fields(Scale)})
+    report = asyncio.run(
+        run_benchmarks(
+            args.database_url,
+            scale,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            scenarios=args.scenario,
+        )
+    )
+
+    print(_summary(report), file=sys.stderr)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
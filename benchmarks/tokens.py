@@ -0,0 +1,169 @@
+"""
+Benchmark signing and verifying access tokens.
+
+    python -m benchmarks.tokens --iterations 5000 --output tokens.json
+
+Runs ``TokenIssuer`` for HS256 and, when the cryptography package is
+installed, for RS256 and EdDSA with keys generated on the fly. Verification
+is measured both with a full decode and through ``VerifiedTokenCache``.
+The report has the same shape as ``benchmarks.run`` and can be compared
+with ``python -m benchmarks.compare``.
+"""
+
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.run import _git_revision, _summary, percentile
+from fastapi_base.tokens import KeyRing, TokenIssuer, VerifiedTokenCache
+
+try:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+except ImportError:  # pragma: no cover
+    serialization = None
+
+CLAIMS = {'sub': 'bench@example.com'}
+
+
+def _write_private_key(keys_dir: Path, algorithm: str) -> None:
+    if algorithm == 'RS256':
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        key = ed25519.Ed25519PrivateKey.generate()
+    (keys_dir / 'bench.pem').write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+
+
+def _key_ring(algorithm: str, keys_dir: Path) -> KeyRing:
+    if algorithm.startswith('HS'):
+        return KeyRing(algorithm, secret='benchmark-secret-' * 4)
+    algorithm_dir = keys_dir / algorithm
+    algorithm_dir.mkdir()
+    _write_private_key(algorithm_dir, algorithm)
+    return KeyRing(algorithm, keys_dir=str(algorithm_dir))
+
+
+def measure(
+    name: str, operation: Callable[[int], Any], iterations: int
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    start = perf_counter()
+    for i in range(iterations):
+        op_start = perf_counter()
+        operation(i)
+        latencies.append(perf_counter() - op_start)
+    elapsed = perf_counter() - start
+
+    latencies.sort()
+    return {
+        'name': name,
+        'requests': iterations,
+        'errors': 0,
+        'seconds': round(elapsed, 4),
+        'throughput_rps': round(iterations / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 4),
+            'p95': round(percentile(latencies, 95) * 1000, 4),
+            'p99': round(percentile(latencies, 99) * 1000, 4),
+            'mean': round(sum(latencies) / len(latencies) * 1000, 4),
+            'max': round(latencies[-1] * 1000, 4),
+        },
+        'queries_per_request': 0,
+    }
+
+
+def run_token_benchmarks(
+    iterations: int = 1000, algorithms: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Sign and verify tokens with every algorithm and return the report.
+    """
+    if algorithms is None:
+        algorithms = ['HS256']
+        if serialization is not None:
+            algorithms += ['RS256', 'EdDSA']
+
+    results = []
+    with TemporaryDirectory() as keys_dir:
+        for algorithm in algorithms:
+            issuer = TokenIssuer(
+                _key_ring(algorithm, Path(keys_dir)), lifetime_seconds=1800
+            )
+            tokens = [issuer.issue(CLAIMS) for _ in range(iterations)]
+            cache = VerifiedTokenCache(max_size=iterations)
+
+            def verify_cached(i, issuer=issuer, tokens=tokens, cache=cache):
+                if cache.get(tokens[i]) is None:
+                    cache.set(tokens[i], issuer.verify(tokens[i]))
+
+            # One pass fills the cache so the measured one only hits it
+            for i in range(iterations):
+                verify_cached(i)
+
+            results += [
+                measure(
+                    f'{algorithm}_sign',
+                    lambda i, issuer=issuer: issuer.issue(CLAIMS),
+                    iterations,
+                ),
+                measure(
+                    f'{algorithm}_verify',
+                    lambda i, issuer=issuer, tokens=tokens: issuer.verify(
+                        tokens[i]
+                    ),
+                    iterations,
+                ),
+                measure(
+                    f'{algorithm}_verify_cached', verify_cached, iterations
+                ),
+            ]
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'iterations': iterations,
+            'algorithms': algorithms,
+        },
+        'results': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument(
+        '--algorithm',
+        action='append',
+        choices=['HS256', 'RS256', 'EdDSA'],
+        help='Run only this algorithm (repeatable)',
+    )
+    parser.add_argument('--output', help='Write the JSON report here')
+    args = parser.parse_args(argv)
+
+    report = run_token_benchmarks(args.iterations, args.algorithm)
+
+    print(_summary(report), file=sys.stderr)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,10 +5,24 @@ from logging import getLogger
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from fastapi_base.database import create_tables
+from fastapi_base.audit import audit_writer
+from fastapi_base.authorization import authorization_cache
+from fastapi_base.database import create_tables, pool_status, query_totals
+from fastapi_base.metrics import CONTENT_TYPE, registry, stats_collector
+from fastapi_base.middleware import MetricsMiddleware, QueryStatsMiddleware
+from fastapi_base.revocation import revocation_list
 from fastapi_base.routers import auth, group, permission, role, users
-from fastapi_base.schemas.response import Response
+from fastapi_base.schemas.response import DatabasePoolStatus, Response
+from fastapi_base.security import (
+    bulk_hash_pool,
+    key_ring,
+    key_watcher,
+    password_hash_pool,
+    settings,
+    token_cache,
+)
 
 if sys.platform == 'win32':  # pragma: no cover
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -31,6 +45,81 @@ app.add_middleware(
     allow_methods=['*'],
     allow_headers=['*'],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+registry.register_collector(
+    stats_collector(
+        'db_pool',
+        pool_status,
+        'Database connection pool',
+        counters={'checkouts', 'checkout_seconds', 'timeouts'},
+    )
+)
+registry.register_collector(
+    stats_collector(
+        'db_queries',
+        lambda: {'count': query_totals.count, 'seconds': query_totals.seconds},
+        'SQL statements executed',
+        counters={'count', 'seconds'},
+    )
+)
+registry.register_collector(
+    stats_collector(
+        'authorization_cache',
+        authorization_cache.stats,
+        'Authorization snapshot cache',
+        counters={'hits', 'misses'},
+    )
+)
+registry.register_collector(
+    stats_collector(
+        'token_cache',
+        token_cache.stats,
+        'Verified access token cache',
+        counters={'hits', 'misses'},
+    )
+)
+registry.register_collector(
+    stats_collector(
+        'token_revocations',
+        revocation_list.stats,
+        'Token revocation list',
+        counters={'refreshes', 'failed'},
+    )
+)
+registry.register_collector(
+    stats_collector(
+        'signing_keys',
+        key_watcher.stats,
+        'Signing key reloads',
+        counters={'reloads', 'failed'},
+    )
+)
+registry.register_collector(
+    stats_collector(
+        'password_hash_pool',
+        password_hash_pool.stats,
+        'Password hashing worker pool',
+        counters={'completed'},
+    )
+)
+registry.register_collector(
+    stats_collector(
+        'bulk_hash_pool',
+        bulk_hash_pool.stats,
+        'Bulk import password hashing worker pool',
+        counters={'completed'},
+    )
+)
+registry.register_collector(
+    stats_collector(
+        'audit',
+        audit_writer.stats,
+        'Audit log writer',
+        counters={'written', 'dropped', 'failed', 'batches'},
+    )
+)
 
 logger = getLogger('uvicorn.error')
 
@@ -38,6 +127,18 @@ logger = getLogger('uvicorn.error')
 @app.on_event('startup')
 async def startup_event():  # pragma: no cover
     await create_tables()
+    await audit_writer.start()
+    await revocation_list.start()
+    await key_watcher.start()
+
+
+@app.on_event('shutdown')
+async def shutdown_event():  # pragma: no cover
+    await audit_writer.stop()
+    await revocation_list.stop()
+    await key_watcher.stop()
+    password_hash_pool.shutdown()
+    bulk_hash_pool.shutdown()
 
 
 app.include_router(users.users_router)
@@ -50,3 +151,27 @@ app.include_router(group.groups_router)
 @app.get('/status', status_code=HTTPStatus.OK, response_model=Response)
 async def read_root():
     return {'message': 'Up!'}
+
+
+@app.get('/metrics', include_in_schema=False)
+async def read_metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.get('/.well-known/jwks.json', include_in_schema=False)
+async def read_jwks():
+    return JSONResponse(
+        key_ring.jwks(),
+        headers={
+            'Cache-Control': f'public, max-age={settings.JWKS_MAX_AGE_SECONDS}'
+        },
+    )
+
+
+@app.get(
+    '/status/database',
+    status_code=HTTPStatus.OK,
+    response_model=DatabasePoolStatus,
+)
+async def read_database_status():
+    return pool_status()
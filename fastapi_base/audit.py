@@ -0,0 +1,180 @@
+import asyncio
+from logging import getLogger
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_base.database import engine
+from fastapi_base.models import AuditLog
+from fastapi_base.settings import Settings
+from fastapi_base.tokens import utcnow
+
+logger = getLogger('uvicorn.error')
+
+DROP_POLICIES = {'drop_newest', 'drop_oldest', 'block'}
+
+_STOP = object()
+
+
+class AuditLogWriter:
+    """
+    Buffers audit events in a bounded queue and writes them in batches from
+    a single background task, so request handlers never wait for an audit
+    commit.
+
+    A batch is flushed when it reaches ``batch_size`` events or when
+    ``flush_interval`` seconds have passed since its first event. When the
+    queue is full, ``drop_policy`` decides between discarding the new event
+    (``drop_newest``), discarding the oldest queued one (``drop_oldest``) or
+    making the caller wait for room (``block``).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        drop_policy: str = 'drop_newest',
+    ):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f'Unknown audit drop policy: {drop_policy}')
+
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+        }
+
+    async def submit(
+        self,
+        user_id: Optional[int],
+        action: str,
+        resource_type: str,
+        resource_id: Optional[int] = None,
+        details: Optional[Dict[str, Any]] = None,
+        ip_address: Optional[str] = None,
+    ) -> bool:
+        """
+        Queue an audit event. Returns False when it was dropped.
+
+        The event is timestamped here rather than by the database, which
+        would stamp every event of a batch with the time it is flushed.
+        """
+        entry = {
+            'timestamp': utcnow(),
+            'user_id': user_id,
+            'action': action,
+            'resource_type': resource_type,
+            'resource_id': resource_id,
+            'details': details,
+            'ip_address': ip_address,
+        }
+
+        if self.drop_policy == 'block':
+            await self._queue.put(entry)
+            return True
+
+        if self._queue.full() and self.drop_policy == 'drop_oldest':
+            self._queue.get_nowait()
+            self.dropped += 1
+
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the writer after draining every queued event.
+        """
+        if self.running:
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+
+        remaining = []
+        while not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry is not _STOP:
+                remaining.append(entry)
+        for start in range(0, len(remaining), self.batch_size):
+            await self._write(remaining[start : start + self.batch_size])
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                break
+
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+
+        try:
+            async with self.session_factory() as session:
+                await session.execute(insert(AuditLog), batch)
+                await session.commit()
+        except Exception:
+            self.failed += len(batch)
+            logger.exception(f'Failed to write {len(batch)} audit log(s).')
+            return
+
+        self.written += len(batch)
+        self.batches += 1
+
+
+settings = Settings()
+
+audit_writer = AuditLogWriter(
+    session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+    max_queue_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    drop_policy=settings.AUDIT_DROP_POLICY,
+)
@@ -0,0 +1,411 @@
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from hashlib import sha256
+from time import monotonic
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import select, union, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_base.conditions import (
+    CompiledConditions,
+    compile_conditions,
+    evaluate_conditions,
+)
+from fastapi_base.models import (
+    Permission,
+    User,
+    group_roles,
+    role_permissions,
+    user_groups,
+    user_permissions,
+    user_roles,
+)
+from fastapi_base.settings import Settings
+
+PermissionKey = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class AuthorizationSnapshot:
+    """
+    Effective permissions of a user, compiled once from the ORM graph.
+
+    ``unconditional`` holds the ``(resource, action)`` pairs granted without
+    conditions, so the common case is a single set lookup. ``conditional``
+    maps the remaining pairs to the conditions of every matching permission.
+    ``version`` is the ``authorization_version`` of the user it was compiled
+    from, and is left out of the digest.
+    """
+
+    user_id: int
+    is_active: bool = True
+    is_superuser: bool = False
+    unconditional: FrozenSet[PermissionKey] = field(default_factory=frozenset)
+    conditional: Dict[PermissionKey, Tuple[CompiledConditions, ...]] = field(
+        default_factory=dict
+    )
+    email: Optional[str] = None
+    version: int = 0
+
+    @property
+    def digest(self) -> str:
+        """
+        Short fingerprint of everything that affects authorization, used as
+        the permissions version embedded in stateless access tokens.
+        """
+        payload = json.dumps(
+            [
+                self.user_id,
+                self.is_active,
+                self.is_superuser,
+                sorted(self.unconditional),
+                sorted(
+                    [list(key), [c.source for c in conditions]]
+                    for key, conditions in self.conditional.items()
+                ),
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return sha256(payload.encode()).hexdigest()[:16]
+
+    def allows(
+        self,
+        resource: str,
+        action: str,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        if self.is_superuser:
+            return True
+
+        key = (resource, action)
+        if key in self.unconditional:
+            return True
+
+        context = context or {}
+        return any(
+            conditions(context) for conditions in self.conditional.get(key, ())
+        )
+
+
+def compile_permissions(user: User) -> AuthorizationSnapshot:
+    """
+    Walk the direct, role and group permissions of a user exactly once and
+    index them by ``(resource, action)``.
+    """
+    permissions = list(user.direct_permissions)
+    for role in user.roles:
+        permissions.extend(role.permissions)
+    for group in user.groups:
+        for role in group.roles:
+            permissions.extend(role.permissions)
+
+    unconditional = set()
+    conditional: Dict[PermissionKey, list] = {}
+    seen = set()
+    for permission in permissions:
+        if permission.id in seen:
+            continue
+        seen.add(permission.id)
+
+        key = (permission.resource, permission.action)
+        if permission.conditions:
+            conditional.setdefault(key, []).append(
+                compile_conditions(permission.conditions)
+            )
+        else:
+            unconditional.add(key)
+
+    return AuthorizationSnapshot(
+        user_id=user.id,
+        email=user.email,
+        is_active=user.is_active,
+        is_superuser=user.is_superuser,
+        version=user.authorization_version,
+        unconditional=frozenset(unconditional),
+        conditional={
+            key: tuple(conditions)
+            for key, conditions in conditional.items()
+            if key not in unconditional
+        },
+    )
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Authenticated user rebuilt from trusted token claims, without loading the
+    ``User`` row. Carries the snapshot the claims were checked against.
+    """
+
+    id: int
+    email: str
+    is_active: bool
+    is_superuser: bool
+    authorization: AuthorizationSnapshot
+
+    @classmethod
+    def from_snapshot(cls, snapshot: AuthorizationSnapshot) -> 'Principal':
+        return cls(
+            id=snapshot.user_id,
+            email=snapshot.email,
+            is_active=snapshot.is_active,
+            is_superuser=snapshot.is_superuser,
+            authorization=snapshot,
+        )
+
+
+class AuthorizationCache:
+    """
+    Process-wide LRU cache of authorization snapshots keyed by user id.
+
+    A snapshot is only served while its ``version`` matches the user's
+    ``authorization_version`` in the database, which every change to the
+    user's permissions increments, so changes made by other workers are
+    seen on the next request. Entries also expire after ``ttl`` seconds,
+    and the worker that made a change drops them right away.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int) -> Optional[AuthorizationSnapshot]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, snapshot: AuthorizationSnapshot) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[snapshot.user_id] = (monotonic() + self.ttl, snapshot)
+        self._entries.move_to_end(snapshot.user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+settings = Settings()
+
+authorization_cache = AuthorizationCache(
+    max_size=settings.AUTHORIZATION_CACHE_MAX_SIZE,
+    ttl=settings.AUTHORIZATION_CACHE_TTL_SECONDS,
+)
+
+
+def get_authorization_snapshot(
+    user: User | Principal,
+) -> AuthorizationSnapshot:
+    """
+    Return the cached snapshot of a user, compiling it from the user's
+    loaded permission graph when it is missing or out of date.
+    """
+    if isinstance(user, Principal):
+        return user.authorization
+
+    snapshot = authorization_cache.get(user.id)
+    if snapshot is None or snapshot.version != user.authorization_version:
+        snapshot = compile_permissions(user)
+        authorization_cache.set(snapshot)
+    return snapshot
+
+
+async def load_authorization_snapshot(
+    session: AsyncSession, user: User | Principal
+) -> AuthorizationSnapshot:
+    """
+    Like ``get_authorization_snapshot``, for users loaded without their
+    permission graph: the graph is only loaded when the cached snapshot
+    is missing or out of date.
+    """
+    if isinstance(user, Principal):
+        return user.authorization
+
+    snapshot = authorization_cache.get(user.id)
+    if snapshot is not None and snapshot.version == user.authorization_version:
+        return snapshot
+
+    user = await session.scalar(
+        select(User)
+        .where(User.id == user.id)
+        .execution_options(populate_existing=True)
+    )
+    snapshot = compile_permissions(user)
+    authorization_cache.set(snapshot)
+    return snapshot
+
+
+async def commit_authorization_change(
+    session: AsyncSession, user_ids: Iterable[int]
+) -> None:
+    """
+    Commit a change to the permissions of the given users, incrementing
+    their ``authorization_version`` in the same transaction so cached
+    snapshots are refused by every worker, including snapshots compiled
+    concurrently and cached after the change.
+    """
+    user_ids = set(user_ids)
+    if user_ids:
+        await session.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(authorization_version=User.authorization_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+    await session.commit()
+    authorization_cache.invalidate(user_ids)
+
+
+def _users_with_role(role_id: int):
+    return union(
+        select(user_roles.c.user_id).where(user_roles.c.role_id == role_id),
+        select(user_groups.c.user_id)
+        .join(group_roles, group_roles.c.group_id == user_groups.c.group_id)
+        .where(group_roles.c.role_id == role_id),
+    )
+
+
+def _users_in_group(group_id: int):
+    return select(user_groups.c.user_id).where(
+        user_groups.c.group_id == group_id
+    )
+
+
+def _users_with_permission(permission_id: int):
+    roles = select(role_permissions.c.role_id).where(
+        role_permissions.c.permission_id == permission_id
+    )
+    return union(
+        select(user_permissions.c.user_id).where(
+            user_permissions.c.permission_id == permission_id
+        ),
+        select(user_roles.c.user_id).where(user_roles.c.role_id.in_(roles)),
+        select(user_groups.c.user_id)
+        .join(group_roles, group_roles.c.group_id == user_groups.c.group_id)
+        .where(group_roles.c.role_id.in_(roles)),
+    )
+
+
+async def affected_user_ids(
+    session: AsyncSession,
+    *,
+    user_id: Optional[int] = None,
+    group_id: Optional[int] = None,
+    role_id: Optional[int] = None,
+    permission_id: Optional[int] = None,
+) -> Set[int]:
+    """
+    Find the users whose effective permissions depend on the given user,
+    group, role or permission.
+
+    Call it before the change removes association rows, or after it adds
+    them, and pass the returned ids to ``commit_authorization_change``.
+    """
+    user_ids: Set[int] = set()
+    if user_id is not None:
+        user_ids.add(user_id)
+
+    queries = []
+    if group_id is not None:
+        queries.append(_users_in_group(group_id))
+    if role_id is not None:
+        queries.append(_users_with_role(role_id))
+    if permission_id is not None:
+        queries.append(_users_with_permission(permission_id))
+
+    for query in queries:
+        user_ids.update(await session.scalars(query))
+
+    return user_ids
+
+
+def _permission_conditions_query(user_id: int, resource: str, action: str):
+    matches = (Permission.resource == resource, Permission.action == action)
+    return union_all(
+        select(Permission.conditions)
+        .join(
+            user_permissions,
+            user_permissions.c.permission_id == Permission.id,
+        )
+        .where(user_permissions.c.user_id == user_id, *matches),
+        select(Permission.conditions)
+        .join(
+            role_permissions,
+            role_permissions.c.permission_id == Permission.id,
+        )
+        .join(user_roles, user_roles.c.role_id == role_permissions.c.role_id)
+        .where(user_roles.c.user_id == user_id, *matches),
+        select(Permission.conditions)
+        .join(
+            role_permissions,
+            role_permissions.c.permission_id == Permission.id,
+        )
+        .join(group_roles, group_roles.c.role_id == role_permissions.c.role_id)
+        .join(user_groups, user_groups.c.group_id == group_roles.c.group_id)
+        .where(user_groups.c.user_id == user_id, *matches),
+    )
+
+
+async def fetch_permission_conditions(
+    session: AsyncSession, user_id: int, resource: str, action: str
+) -> list:
+    """
+    Return the conditions of every permission granting ``resource``/
+    ``action`` to the user, directly, through a role or through a group's
+    role, in a single query and without loading any ORM object.
+    """
+    result = await session.scalars(
+        _permission_conditions_query(user_id, resource, action)
+    )
+    return list(result)
+
+
+async def has_permission_sql(
+    session: AsyncSession,
+    user: User | Principal,
+    resource: str,
+    action: str,
+    context: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """
+    Database-backed alternative to ``AuthorizationSnapshot.allows``.
+    """
+    if user.is_superuser:
+        return True
+
+    context = context or {}
+    return any(
+        evaluate_conditions(conditions, context)
+        for conditions in await fetch_permission_conditions(
+            session, user.id, resource, action
+        )
+    )
@@ -0,0 +1,83 @@
+import hashlib
+from http import HTTPStatus
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def weak_etag(resource_id: int, versions: Iterable[tuple]) -> str:
+    """
+    Build a weak ETag from the id of a record and the versions of the rows
+    it renders.
+    """
+    digest = hashlib.blake2b(
+        repr(sorted(versions)).encode(), digest_size=8
+    ).hexdigest()
+    return f'W/"{resource_id}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an ETag against an ``If-None-Match`` header.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(
+        candidate.strip().removeprefix('W/') == opaque
+        for candidate in if_none_match.split(',')
+    )
+
+
+async def conditional_get(  # noqa: PLR0913, PLR0917
+    session: AsyncSession,
+    model,
+    resource_id: int,
+    request: Request,
+    response: Response,
+    *embedded,
+) -> None:
+    """
+    Set the ETag of a record on the response, or answer ``304 Not
+    Modified`` when the client already holds that version.
+
+    The ETag covers the ``version`` of the record and the id and
+    ``version`` of every row of the ``embedded`` relationships the
+    response renders, so renaming, adding, removing or deleting one of
+    them changes it too. All of them are read in a single query, and
+    unchanged records are never loaded nor serialized. Missing records
+    are left to the route, which answers 404.
+    """
+    stmt = union_all(
+        select(literal(''), model.id, model.version).where(
+            model.id == resource_id
+        ),
+        *(
+            select(
+                literal(attr.key),
+                attr.property.entity.class_.id,
+                attr.property.entity.class_.version,
+            )
+            .select_from(model)
+            .join(attr)
+            .where(model.id == resource_id)
+            for attr in embedded
+        ),
+    )
+    versions = [tuple(row) for row in await session.execute(stmt)]
+    if not versions:
+        return
+
+    etag = weak_etag(resource_id, versions)
+    headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_MODIFIED, headers=headers
+        )
+    response.headers.update(headers)
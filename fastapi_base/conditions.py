@@ -0,0 +1,131 @@
+import json
+from datetime import datetime
+from functools import lru_cache
+from ipaddress import ip_address, ip_network
+from typing import Any, Callable, Dict, Optional, Tuple
+
+Context = Dict[str, Any]
+Evaluator = Callable[[Context], bool]
+ConditionCompiler = Callable[[Any], Evaluator]
+
+_compilers: Dict[str, ConditionCompiler] = {}
+
+
+def register_condition(name: str):
+    """
+    Register a compiler for a ``Permission.conditions`` key.
+
+    The compiler receives the condition value once and returns an evaluator
+    that is called with the request context on every check.
+    """
+
+    def decorator(compiler: ConditionCompiler) -> ConditionCompiler:
+        _compilers[name] = compiler
+        return compiler
+
+    return decorator
+
+
+@register_condition('time_between')
+def _compile_time_between(value: Any) -> Evaluator:
+    start_time = datetime.strptime(value[0], '%H:%M').time()
+    end_time = datetime.strptime(value[1], '%H:%M').time()
+
+    def evaluate(context: Context) -> bool:
+        current_time = context.get('current_time') or datetime.now().time()
+        return start_time <= current_time <= end_time
+
+    return evaluate
+
+
+@register_condition('ip_range')
+def _compile_ip_range(value: Any) -> Evaluator:
+    networks = [ip_network(entry, strict=False) for entry in value]
+    # Single addresses are matched with a set lookup, real ranges by CIDR
+    addresses = frozenset(
+        net.network_address
+        for net in networks
+        if net.prefixlen == net.max_prefixlen
+    )
+    ranges = tuple(
+        net for net in networks if net.prefixlen < net.max_prefixlen
+    )
+
+    def evaluate(context: Context) -> bool:
+        ip = context.get('ip_address')
+        if not ip:
+            return False
+        try:
+            address = ip_address(ip)
+        except ValueError:
+            return False
+        return address in addresses or any(address in net for net in ranges)
+
+    return evaluate
+
+
+def _deny(context: Context) -> bool:
+    return False
+
+
+class CompiledConditions:
+    """
+    Evaluators built once from a ``Permission.conditions`` mapping.
+    """
+
+    __slots__ = ('source', '_evaluators')
+
+    def __init__(
+        self, source: Optional[Dict[str, Any]], evaluators: Tuple
+    ) -> None:
+        self.source = source
+        self._evaluators = evaluators
+
+    def __call__(self, context: Context) -> bool:
+        return all(evaluate(context) for evaluate in self._evaluators)
+
+    def __repr__(self) -> str:
+        return f'CompiledConditions({self.source!r})'
+
+
+def compile_conditions(
+    conditions: Optional[Dict[str, Any]], strict: bool = False
+) -> CompiledConditions:
+    """
+    Compile a conditions mapping into evaluators.
+
+    Unknown condition keys are ignored and malformed values deny access,
+    unless ``strict`` is set, in which case both raise ``ValueError``.
+    """
+    evaluators = []
+    for key, value in (conditions or {}).items():
+        compiler = _compilers.get(key)
+        if compiler is None:
+            if strict:
+                raise ValueError(f'Unknown condition: {key}')
+            continue
+        try:
+            evaluators.append(compiler(value))
+        except (TypeError, ValueError, IndexError) as exc:
+            if strict:
+                raise ValueError(f'Invalid value for condition {key}') from exc
+            evaluators.append(_deny)
+
+    return CompiledConditions(conditions, tuple(evaluators))
+
+
+@lru_cache(maxsize=1024)
+def _compile_serialized(serialized: str) -> CompiledConditions:
+    return compile_conditions(json.loads(serialized))
+
+
+def evaluate_conditions(
+    conditions: Optional[Dict[str, Any]], context: Context
+) -> bool:
+    """
+    Evaluate a raw conditions mapping, reusing previously compiled
+    evaluators for identical mappings.
+    """
+    if not conditions:
+        return True
+    return _compile_serialized(json.dumps(conditions, sort_keys=True))(context)
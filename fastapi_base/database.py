@@ -1,9 +1,234 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from sqlalchemy import Insert, Table, event, exc, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from fastapi_base.models import Base
 from fastapi_base.settings import Settings
 
-engine = create_async_engine(Settings().DATABASE_URL)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long checkouts take, including the time
+    spent waiting for a free connection, and how many of them timed out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+        self.timeouts = 0
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = perf_counter() - start
+            self.checkouts += 1
+            self.checkout_seconds += elapsed
+            self.max_checkout_seconds = max(self.max_checkout_seconds, elapsed)
+
+
+@dataclass
+class QueryStats:
+    """
+    Number of statements, total time spent in the database and the slowest
+    statement seen while tracking.
+    """
+
+    count: int = 0
+    seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.seconds += elapsed
+        if elapsed >= self.slowest_seconds:
+            self.slowest_seconds = elapsed
+            self.slowest_statement = statement
+
+
+# Every statement executed by an instrumented engine, process wide
+query_totals = QueryStats()
+
+_active_query_stats: ContextVar[Tuple[QueryStats, ...]] = ContextVar(
+    'active_query_stats', default=()
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Collect the statements executed in the current context. Tracking can
+    be nested; each level sees every statement run inside it.
+    """
+    stats = QueryStats()
+    token = _active_query_stats.set(_active_query_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_query_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, *args) -> None:
+    conn.info.setdefault('query_start', []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, *args) -> None:
+    elapsed = perf_counter() - conn.info['query_start'].pop()
+    query_totals.record(statement, elapsed)
+    for stats in _active_query_stats.get():
+        stats.record(statement, elapsed)
+
+
+def _handle_error(context) -> None:
+    # Keep the start time stack balanced when a statement fails
+    starts = (
+        context.connection.info.get('query_start')
+        if context.connection
+        else None
+    )
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> AsyncEngine:
+    """
+    Time every statement run by ``engine`` and report it to
+    `track_queries` blocks and `query_totals`.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(
+        sync_engine, 'before_cursor_execute', _before_cursor_execute
+    ):
+        event.listen(
+            sync_engine, 'before_cursor_execute', _before_cursor_execute
+        )
+        event.listen(
+            sync_engine, 'after_cursor_execute', _after_cursor_execute
+        )
+        event.listen(sync_engine, 'handle_error', _handle_error)
+    return engine
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record) -> None:
+    # SQLite only enforces foreign keys, and so ON DELETE CASCADE, when
+    # asked to on each connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def create_engine_from_settings(settings: Settings) -> AsyncEngine:
+    """
+    Create the async engine with the pool and driver tuning from settings.
+    """
+    url = make_url(settings.DATABASE_URL)
+    options: Dict[str, Any] = {
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+    }
+    connect_args: Dict[str, Any] = {}
+
+    if url.get_backend_name() != 'sqlite':
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        )
+
+    if url.get_backend_name() == 'postgresql':
+        statement_timeout = settings.DATABASE_STATEMENT_TIMEOUT_MS
+        if statement_timeout is not None:
+            connect_args['options'] = (
+                f'-c statement_timeout={statement_timeout}'
+            )
+        if url.get_driver_name() == 'psycopg':
+            connect_args['prepare_threshold'] = (
+                settings.DATABASE_PREPARE_THRESHOLD
+            )
+
+    if connect_args:
+        options['connect_args'] = connect_args
+
+    async_engine = create_async_engine(url, **options)
+    if url.get_backend_name() == 'sqlite':
+        # Association rows rely on ON DELETE CASCADE (passive_deletes)
+        event.listen(async_engine.sync_engine, 'connect', _enable_foreign_keys)
+    return async_engine
+
+
+engine = instrument_engine(create_engine_from_settings(Settings()))
+
+
+def pool_status(engine: AsyncEngine = engine) -> Dict[str, Any]:
+    """
+    Report connection pool usage. Sizing figures are only available for
+    queue pools.
+    """
+    pool = engine.pool
+    status: Dict[str, Any] = {'pool': type(pool).__name__}
+
+    if hasattr(pool, 'checkedout'):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(
+            checkouts=pool.checkouts,
+            checkout_seconds=pool.checkout_seconds,
+            max_checkout_seconds=pool.max_checkout_seconds,
+            timeouts=pool.timeouts,
+        )
+
+    return status
+
+
+def insert_ignore(session: AsyncSession | Session, table: Table) -> Insert:
+    """
+    Build an INSERT for ``table`` that skips rows violating a unique
+    constraint, using the ON CONFLICT DO NOTHING form of the session's
+    dialect.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+
+    raise NotImplementedError(f'insert_ignore is not supported on {dialect}')
+
+
+async def existing_ids(
+    session: AsyncSession, column, ids: Iterable[int]
+) -> Set[int]:
+    """
+    Return which of ``ids`` exist in the primary key ``column``.
+    """
+    result = await session.scalars(select(column).where(column.in_(ids)))
+    return set(result.all())
 
 
 async def get_session():  # pragma: no cover
@@ -0,0 +1,256 @@
+from bisect import bisect_left
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base class of the metrics below: a name, a help text and one value per
+    combination of label values.
+    """
+
+    kind = 'untyped'
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+
+    def samples(self) -> Iterable[str]:  # pragma: no cover
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return self.header() + list(self.samples())
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield (
+                f'{self.name}{_format_labels(self.labelnames, labels)} '
+                f'{_format_value(value)}'
+            )
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        bucket_labels = (*self.labelnames, 'le')
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                label_text = _format_labels(
+                    bucket_labels, (*labels, _format_value(bound))
+                )
+                yield f'{self.name}_bucket{label_text} {cumulative}'
+            label_text = _format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{label_text} {_format_value(total)}'
+            yield f'{self.name}_count{label_text} {cumulative}'
+
+
+Collector = Callable[[], Iterable[Metric]]
+
+
+class Registry:
+    """
+    Holds the metrics exposed on /metrics.
+
+    Metrics updated on the request path are registered directly. Figures
+    that already live elsewhere (pool, caches, queues) are read by
+    collectors only when the endpoint is scraped.
+    """
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector) -> Collector:
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def stats_collector(
+    prefix: str,
+    stats: Callable[[], Dict[str, Any]],
+    documentation: str,
+    counters: Iterable[str] = (),
+) -> Collector:
+    """
+    Expose the numeric entries of a ``stats()`` dict as gauges, or as
+    ``_total`` counters for the keys listed in ``counters``.
+    """
+    counters = set(counters)
+
+    def collect() -> Iterable[Metric]:
+        for key, value in stats().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in counters:
+                metric = Counter(
+                    f'{prefix}_{key}_total', f'{documentation}: {key}'
+                )
+            else:
+                metric = Gauge(f'{prefix}_{key}', f'{documentation}: {key}')
+            metric.inc(amount=value)
+            yield metric
+
+    return collect
+
+
+registry = Registry()
+
+http_requests_total = registry.register(
+    Counter(
+        'http_requests_total',
+        'HTTP requests handled',
+        ('method', 'route', 'status'),
+    )
+)
+http_request_duration_seconds = registry.register(
+    Histogram(
+        'http_request_duration_seconds',
+        'HTTP request latency in seconds',
+        ('method', 'route'),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge(
+        'http_requests_in_flight',
+        'HTTP requests currently being handled',
+        ('method',),
+    )
+)
+jwt_decode_failures_total = registry.register(
+    Counter(
+        'jwt_decode_failures_total',
+        'Access tokens rejected while decoding',
+        ('reason',),
+    )
+)
+
+
+def route_label(scope: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the path template of the route that handled a request, so
+    ``/users/1`` and ``/users/2`` share the ``/users/{user_id}`` label.
+    """
+    route = scope.get('route')
+    return getattr(route, 'path', None)
@@ -0,0 +1,117 @@
+from logging import getLogger
+from time import perf_counter
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from fastapi_base.database import QueryStats, track_queries
+from fastapi_base.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+    route_label,
+)
+from fastapi_base.settings import Settings
+
+logger = getLogger('uvicorn.error')
+
+settings = Settings()
+
+MAX_LOGGED_STATEMENT_LENGTH = 500
+
+
+class QueryStatsMiddleware:
+    """
+    Track the SQL statements run by each request.
+
+    Every request is logged with its query count, database time and
+    slowest statement as structured fields; requests running more than
+    ``QUERY_COUNT_WARNING`` statements are logged as warnings. In debug
+    mode the figures are also sent back as ``X-DB-*`` response headers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        with track_queries() as stats:
+
+            async def send_with_headers(message: Message) -> None:
+                if message['type'] == 'http.response.start' and settings.DEBUG:
+                    headers = MutableHeaders(scope=message)
+                    headers['X-DB-Query-Count'] = str(stats.count)
+                    headers['X-DB-Time-Ms'] = f'{stats.seconds * 1000:.2f}'
+                    headers['X-DB-Slowest-Ms'] = (
+                        f'{stats.slowest_seconds * 1000:.2f}'
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_headers)
+            finally:
+                self._log(scope, stats, perf_counter() - start)
+
+    @staticmethod
+    def _log(scope: Scope, stats: QueryStats, elapsed: float) -> None:
+        fields = {
+            'method': scope['method'],
+            'path': scope['path'],
+            'duration_ms': round(elapsed * 1000, 2),
+            'db_query_count': stats.count,
+            'db_time_ms': round(stats.seconds * 1000, 2),
+            'db_slowest_ms': round(stats.slowest_seconds * 1000, 2),
+            'db_slowest_statement': (stats.slowest_statement or '')[
+                :MAX_LOGGED_STATEMENT_LENGTH
+            ],
+        }
+        log = (
+            logger.warning
+            if stats.count > settings.QUERY_COUNT_WARNING
+            else logger.debug
+        )
+        log(
+            f'{scope["method"]} {scope["path"]} ran {stats.count} queries',
+            extra=fields,
+        )
+
+
+class MetricsMiddleware:
+    """
+    Record request counts, latency and in-flight requests per route.
+
+    Routes are labelled with their path template; requests that match no
+    route share the ``unmatched`` label to keep label cardinality bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            http_requests_in_flight.dec(method)
+            route = route_label(scope) or 'unmatched'
+            http_request_duration_seconds.observe(elapsed, method, route)
+            http_requests_total.inc(method, route, str(status))
@@ -8,11 +8,13 @@ from sqlalchemy import (
     Boolean,
     Column,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
     Text,
     func,
+    literal_column,
 )
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -29,47 +31,111 @@ class Base(DeclarativeBase):
 
 table_registry = registry()
 
+# Loading strategy profile for relationships.
+# Collections needed to authorize a request or to render the default response
+# schemas are loaded eagerly. Heavy collections, which grow without bound, are
+# never loaded implicitly: routes that need them must ask for them through
+# loader options, e.g. ``selectinload(Group.users)``. Reading one that was not
+# loaded raises instead of silently returning an empty list.
+EAGER = 'selectin'
+ON_DEMAND = 'raise'
+
+# Every UPDATE of a versioned row increments its version, which feeds the
+# ETags of the records that render it. Unlike ``updated_at`` it tells apart
+# two writes within the resolution of the clock.
+NEXT_VERSION = literal_column('version') + 1
+
+# Association tables use the pair of foreign keys as primary key, which
+# indexes the forward lookup and rejects duplicate assignments; a second index
+# covers the reverse direction.
 user_roles = Table(
     'user_roles',
     table_registry.metadata,
-    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE')),
-    Column('role_id', Integer, ForeignKey('roles.id', ondelete='CASCADE')),
+    Column(
+        'user_id',
+        Integer,
+        ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
+    Column(
+        'role_id',
+        Integer,
+        ForeignKey('roles.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
+    Index('ix_user_roles_role_id', 'role_id'),
 )
 
 role_permissions = Table(
     'role_permissions',
     table_registry.metadata,
-    Column('role_id', Integer, ForeignKey('roles.id', ondelete='CASCADE')),
+    Column(
+        'role_id',
+        Integer,
+        ForeignKey('roles.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
     Column(
         'permission_id',
         Integer,
         ForeignKey('permissions.id', ondelete='CASCADE'),
+        primary_key=True,
     ),
+    Index('ix_role_permissions_permission_id', 'permission_id'),
 )
 
 user_permissions = Table(
     'user_permissions',
     table_registry.metadata,
-    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE')),
+    Column(
+        'user_id',
+        Integer,
+        ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
     Column(
         'permission_id',
         Integer,
         ForeignKey('permissions.id', ondelete='CASCADE'),
+        primary_key=True,
     ),
+    Index('ix_user_permissions_permission_id', 'permission_id'),
 )
 
 user_groups = Table(
     'user_groups',
     table_registry.metadata,
-    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE')),
-    Column('group_id', Integer, ForeignKey('groups.id', ondelete='CASCADE')),
+    Column(
+        'user_id',
+        Integer,
+        ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
+    Column(
+        'group_id',
+        Integer,
+        ForeignKey('groups.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
+    Index('ix_user_groups_group_id', 'group_id'),
 )
 
 group_roles = Table(
     'group_roles',
     table_registry.metadata,
-    Column('group_id', Integer, ForeignKey('groups.id', ondelete='CASCADE')),
-    Column('role_id', Integer, ForeignKey('roles.id', ondelete='CASCADE')),
+    Column(
+        'group_id',
+        Integer,
+        ForeignKey('groups.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
+    Column(
+        'role_id',
+        Integer,
+        ForeignKey('roles.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
+    Index('ix_group_roles_role_id', 'role_id'),
 )
 
 
@@ -84,23 +150,26 @@ class User:
     roles: Mapped[List['Role']] = relationship(
         secondary=user_roles,
         back_populates='users',
-        lazy='selectin',
+        lazy=EAGER,
         init=False,
     )
     direct_permissions: Mapped[List['Permission']] = relationship(
         secondary=user_permissions,
         back_populates='users',
-        lazy='selectin',
+        lazy=EAGER,
         init=False,
     )
     groups: Mapped[List['Group']] = relationship(
         secondary=user_groups,
         back_populates='users',
-        lazy='selectin',
+        lazy=EAGER,
         init=False,
     )
     audit_logs: Mapped[List['AuditLog']] = relationship(
-        back_populates='user', lazy='selectin', init=False
+        back_populates='user',
+        lazy=ON_DEMAND,
+        passive_deletes=True,
+        init=False,
     )
 
     created_at: Mapped[datetime] = mapped_column(
@@ -109,8 +178,20 @@ class User:
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP, server_default=func.now(), onupdate=func.now(), init=False
     )
+    version: Mapped[int] = mapped_column(
+        Integer,
+        default=1,
+        server_default='1',
+        onupdate=NEXT_VERSION,
+        init=False,
+    )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_superuser: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Incremented by every change to the user's effective permissions, see
+    # ``fastapi_base.authorization.AuthorizationCache``
+    authorization_version: Mapped[int] = mapped_column(
+        Integer, default=1, server_default='1', init=False
+    )
 
 
 @table_registry.mapped_as_dataclass
@@ -122,18 +203,23 @@ class Role:
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     users: Mapped[List['User']] = relationship(
-        secondary=user_roles, back_populates='roles', init=False
+        secondary=user_roles,
+        back_populates='roles',
+        lazy=ON_DEMAND,
+        passive_deletes=True,
+        init=False,
     )
     permissions: Mapped[List['Permission']] = relationship(
         secondary=role_permissions,
         back_populates='roles',
-        lazy='selectin',
+        lazy=EAGER,
         init=False,
     )
     groups: Mapped[List['Group']] = relationship(
         secondary=group_roles,
         back_populates='roles',
-        lazy='selectin',
+        lazy=ON_DEMAND,
+        passive_deletes=True,
         init=False,
     )
 
@@ -143,6 +229,13 @@ class Role:
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP, server_default=func.now(), onupdate=func.now(), init=False
     )
+    version: Mapped[int] = mapped_column(
+        Integer,
+        default=1,
+        server_default='1',
+        onupdate=NEXT_VERSION,
+        init=False,
+    )
 
 
 @table_registry.mapped_as_dataclass
@@ -162,13 +255,15 @@ class Permission:
     roles: Mapped[List['Role']] = relationship(
         secondary=role_permissions,
         back_populates='permissions',
-        lazy='selectin',
+        lazy=ON_DEMAND,
+        passive_deletes=True,
         init=False,
     )
     users: Mapped[List['User']] = relationship(
         secondary=user_permissions,
         back_populates='direct_permissions',
-        lazy='selectin',
+        lazy=ON_DEMAND,
+        passive_deletes=True,
         init=False,
     )
 
@@ -178,6 +273,13 @@ class Permission:
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP, server_default=func.now(), onupdate=func.now(), init=False
     )
+    version: Mapped[int] = mapped_column(
+        Integer,
+        default=1,
+        server_default='1',
+        onupdate=NEXT_VERSION,
+        init=False,
+    )
 
     __table_args__ = (
         {'sqlite_autoincrement': True},  # For SQLite, if used
@@ -195,13 +297,14 @@ class Group:
     users: Mapped[List['User']] = relationship(
         secondary=user_groups,
         back_populates='groups',
-        lazy='selectin',
+        lazy=ON_DEMAND,
+        passive_deletes=True,
         init=False,
     )
     roles: Mapped[List['Role']] = relationship(
         secondary=group_roles,
         back_populates='groups',
-        lazy='selectin',
+        lazy=EAGER,
         init=False,
     )
 
@@ -211,6 +314,13 @@ class Group:
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP, server_default=func.now(), onupdate=func.now(), init=False
     )
+    version: Mapped[int] = mapped_column(
+        Integer,
+        default=1,
+        server_default='1',
+        onupdate=NEXT_VERSION,
+        init=False,
+    )
 
 
 @table_registry.mapped_as_dataclass
@@ -235,7 +345,74 @@ class AuditLog:
     )
 
     user: Mapped[Optional['User']] = relationship(
-        back_populates='audit_logs', lazy='selectin', init=False
+        back_populates='audit_logs', lazy=ON_DEMAND, init=False
+    )
+
+    __table_args__ = (
+        Index('ix_audit_logs_user_id_timestamp', 'user_id', 'timestamp'),
+        Index(
+            'ix_audit_logs_resource_type_resource_id',
+            'resource_type',
+            'resource_id',
+        ),
+    )
+
+
+@table_registry.mapped_as_dataclass
+class RefreshToken:
+    """
+    One signed-in device. The opaque token is rotated on every refresh and
+    only its SHA-256 digest is stored.
+    """
+
+    __tablename__ = 'refresh_tokens'
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), index=True
+    )
+    token_digest: Mapped[str] = mapped_column(
+        String(64), unique=True, index=True
+    )
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP)
+    device: Mapped[Optional[str]] = mapped_column(
+        String(255), nullable=True, default=None
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, server_default=func.now(), init=False
+    )
+    last_used_at: Mapped[Optional[datetime]] = mapped_column(
+        TIMESTAMP, nullable=True, default=None, init=False
+    )
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(
+        TIMESTAMP, nullable=True, default=None, init=False
+    )
+
+
+@table_registry.mapped_as_dataclass
+class TokenRevocation:
+    """
+    Revokes one access token by ``jti``, or every token of a subject issued
+    up to ``not_before``. Rows are read incrementally by id and may be
+    deleted once ``expires_at``, when the tokens they cover have expired,
+    has passed.
+    """
+
+    __tablename__ = 'token_revocations'
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP, index=True)
+    jti: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, default=None
+    )
+    subject: Mapped[Optional[str]] = mapped_column(
+        String(100), nullable=True, default=None
+    )
+    not_before: Mapped[Optional[datetime]] = mapped_column(
+        TIMESTAMP, nullable=True, default=None
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, server_default=func.now(), init=False
     )
 
 
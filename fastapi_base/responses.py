@@ -0,0 +1,49 @@
+from typing import Any, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_base.schemas.filters import CursorParams
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson when it is installed, falling back
+    to the standard library encoder otherwise.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:  # pragma: no cover
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def fast_list_response(
+    session: AsyncSession,
+    page: CursorParams,
+    model,
+    schema: Type[BaseModel],
+    field: str,
+) -> FastJSONResponse:
+    """
+    Answer a list page by selecting only the columns of ``schema`` and
+    encoding the rows directly.
+
+    Rows are not hydrated into ORM objects, so no relationship is loaded,
+    and the response model is bypassed: ``schema`` must only hold fields
+    that map to plain columns of ``model``.
+    """
+    columns = [getattr(model, name) for name in schema.model_fields]
+    result = await session.execute(page.paginate(select(*columns), model.id))
+    rows, next_cursor = page.split(result.all())
+    return FastJSONResponse({
+        field: [row._asdict() for row in rows],
+        'next_cursor': next_cursor,
+    })
@@ -0,0 +1,196 @@
+import asyncio
+from collections import deque
+from logging import getLogger
+from time import monotonic
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_base.database import engine
+from fastapi_base.models import TokenRevocation
+from fastapi_base.settings import Settings
+from fastapi_base.tokens import Claims, from_epoch, to_epoch, utcnow
+
+logger = getLogger('uvicorn.error')
+
+
+async def _purge_expired(session: AsyncSession) -> None:
+    await session.execute(
+        delete(TokenRevocation).where(TokenRevocation.expires_at <= utcnow())
+    )
+    await session.commit()
+
+
+class TokenRevocationList:
+    """
+    In-memory view of the ``token_revocations`` table, so checking a token
+    costs two dict lookups and no query.
+
+    Revocations made by this process apply at once; those made by other
+    processes are picked up by a background task that reads the new rows
+    every ``refresh_interval`` seconds. Entries are forgotten, and their
+    rows deleted, once the tokens they cover have expired.
+
+    Ids are assigned on insert, not on commit, so a row may become visible
+    after rows with higher ids were already read. Each refresh therefore
+    reads again every row past the highest id seen ``overlap`` seconds ago;
+    applying a row twice is harmless.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        refresh_interval: float = 5.0,
+        overlap: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.overlap = overlap
+        self.refreshes = 0
+        self.failed = 0
+        # jti -> expiry, subject -> (not before, expiry), as epoch seconds
+        self._jtis: Dict[str, int] = {}
+        self._subjects: Dict[str, Tuple[int, int]] = {}
+        self._last_id = 0
+        # (monotonic time, highest id seen) after each refresh
+        self._watermarks: Deque[Tuple[float, int]] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def is_revoked(self, claims: Claims) -> bool:
+        jti = claims.get('jti')
+        if jti is not None and jti in self._jtis:
+            return True
+
+        entry = self._subjects.get(claims.get('sub'))
+        # Tokens issued in the same second as the revocation are revoked too
+        return entry is not None and claims.get('iat', 0) <= entry[0]
+
+    def _apply(self, row: Any) -> None:
+        expires_at = to_epoch(row.expires_at)
+        if row.jti is not None:
+            self._jtis[row.jti] = expires_at
+        if row.subject is not None and row.not_before is not None:
+            not_before = to_epoch(row.not_before)
+            current = self._subjects.get(row.subject)
+            if current is None or current[0] < not_before:
+                self._subjects[row.subject] = (not_before, expires_at)
+
+    def _prune(self, now: int) -> None:
+        for jti in [jti for jti, exp in self._jtis.items() if exp <= now]:
+            del self._jtis[jti]
+        for subject in [
+            subject
+            for subject, (_, exp) in self._subjects.items()
+            if exp <= now
+        ]:
+            del self._subjects[subject]
+
+    async def revoke(
+        self,
+        session: AsyncSession,
+        expires_at: int,
+        jti: Optional[str] = None,
+        subject: Optional[str] = None,
+        not_before: Optional[int] = None,
+    ) -> None:
+        """
+        Record and apply a revocation. ``expires_at`` is the latest expiry
+        of the tokens it covers, in epoch seconds.
+        """
+        values = {
+            'expires_at': from_epoch(expires_at),
+            'jti': jti,
+            'subject': subject,
+            'not_before': (
+                from_epoch(not_before) if not_before is not None else None
+            ),
+        }
+        await session.execute(insert(TokenRevocation).values(**values))
+        await session.commit()
+        self._apply(TokenRevocation(**values))
+
+    def _low_watermark(self, now: float) -> int:
+        cutoff = now - self.overlap
+        while len(self._watermarks) > 1 and self._watermarks[1][0] <= cutoff:
+            self._watermarks.popleft()
+        if self._watermarks and self._watermarks[0][0] <= cutoff:
+            return self._watermarks[0][1]
+        return 0
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """
+        Apply the revocations added since the last refresh, and those that
+        committed late within the overlap window.
+        """
+        started = monotonic()
+        result = await session.execute(
+            select(
+                TokenRevocation.id,
+                TokenRevocation.jti,
+                TokenRevocation.subject,
+                TokenRevocation.not_before,
+                TokenRevocation.expires_at,
+            )
+            .where(TokenRevocation.id > self._low_watermark(started))
+            .order_by(TokenRevocation.id)
+        )
+        now = to_epoch(utcnow())
+        for row in result:
+            self._last_id = max(self._last_id, row.id)
+            if to_epoch(row.expires_at) > now:
+                self._apply(row)
+        self._prune(now)
+        self._watermarks.append((started, self._last_id))
+        self.refreshes += 1
+
+    async def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as session:
+                    await self.refresh(session)
+                    await _purge_expired(session)
+            except Exception:
+                self.failed += 1
+                logger.exception('Failed to refresh token revocations.')
+            await asyncio.sleep(self.refresh_interval)
+
+    def clear(self) -> None:
+        self._jtis.clear()
+        self._subjects.clear()
+        self._last_id = 0
+        self._watermarks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'jtis': len(self._jtis),
+            'subjects': len(self._subjects),
+            'refreshes': self.refreshes,
+            'failed': self.failed,
+        }
+
+
+settings = Settings()
+
+revocation_list = TokenRevocationList(
+    session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+    refresh_interval=settings.REVOCATION_REFRESH_SECONDS,
+    overlap=settings.REVOCATION_REFRESH_OVERLAP_SECONDS,
+)
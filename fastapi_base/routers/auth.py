@@ -1,20 +1,40 @@
+from datetime import timedelta
 from http import HTTPStatus
 from logging import getLogger
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from fastapi_base.audit import audit_writer
+from fastapi_base.authorization import (
+    authorization_cache,
+    get_authorization_snapshot,
+    load_authorization_snapshot,
+)
 from fastapi_base.database import get_session
-from fastapi_base.models import User
-from fastapi_base.schemas.jwt import JWTToken
+from fastapi_base.models import RefreshToken, User
+from fastapi_base.revocation import revocation_list
+from fastapi_base.schemas.jwt import (
+    JWTToken,
+    RefreshSessionListSchema,
+    RefreshTokenSchema,
+)
+from fastapi_base.schemas.response import Response
 from fastapi_base.security import (
     create_access_token,
-    create_audit_log,
+    decode_access_token,
     get_current_active_user,
-    verify_password,
+    oauth2_scheme,
+    verify_password_async,
+)
+from fastapi_base.settings import Settings
+from fastapi_base.tokens import (
+    new_refresh_token,
+    refresh_token_digest,
+    utcnow,
 )
 
 auth_router = APIRouter(prefix='/auth', tags=['auth'])
@@ -25,10 +45,26 @@ CurrentUser = Annotated[User, Depends(get_current_active_user)]
 
 logger = getLogger('uvicorn.error')
 
+settings = Settings()
+
+DEVICE_MAX_LENGTH = 255
+
+
+def _refresh_token_expiry(now=None):
+    return (now or utcnow()) + timedelta(
+        days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+    )
+
+
+def _device(request: Optional[Request]) -> Optional[str]:
+    if request is None:
+        return None
+    user_agent = request.headers.get('user-agent')
+    return user_agent[:DEVICE_MAX_LENGTH] if user_agent else None
+
 
 @auth_router.post('/token', response_model=JWTToken, status_code=HTTPStatus.OK)
 async def login_for_access_token(
-    background_tasks: BackgroundTasks,
     session: Session,
     form_data: OAuth2Form,
     request: Request = None,
@@ -44,18 +80,29 @@ async def login_for_access_token(
             detail='Incorrect email or password',
         )
 
-    if not verify_password(form_data.password, user.password):
+    if not await verify_password_async(form_data.password, user.password):
         logger.warning(f'Incorrect password for user {form_data.username}.')
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='Incorrect email or password',
         )
 
-    access_token = create_access_token(data={'sub': user.email})
+    refresh_token, digest = new_refresh_token()
+    device_session = RefreshToken(
+        user_id=user.id,
+        token_digest=digest,
+        expires_at=_refresh_token_expiry(),
+        device=_device(request),
+    )
+    session.add(device_session)
+    await session.flush()
+    access_token = create_access_token(
+        data={'sub': user.email, 'sid': device_session.id},
+        snapshot=get_authorization_snapshot(user),
+    )
+    await session.commit()
 
-    background_tasks.add_task(
-        create_audit_log,
-        db=session,
+    await audit_writer.submit(
         user_id=user.id,
         action='login',
         resource_type='auth',
@@ -66,12 +113,164 @@ async def login_for_access_token(
     return JWTToken(
         access_token=access_token,
         token_type='Bearer',
+        refresh_token=refresh_token,
+        session_id=device_session.id,
+    )
+
+
+@auth_router.post('/refresh', response_model=JWTToken)
+async def refresh_session(body: RefreshTokenSchema, session: Session):
+    """
+    Exchange a refresh token for a new access token and a new refresh
+    token; the presented one stops working.
+
+    The rotation is a single update on the indexed digest, so two
+    concurrent refreshes with the same token cannot both succeed.
+    """
+    refresh_token, digest = new_refresh_token()
+    now = utcnow()
+    rotated = (
+        await session.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_digest
+                == refresh_token_digest(body.refresh_token),
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > now,
+            )
+            .values(
+                token_digest=digest,
+                last_used_at=now,
+                expires_at=_refresh_token_expiry(now),
+            )
+            .returning(RefreshToken.id, RefreshToken.user_id)
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
+    user = None
+    if rotated is not None:
+        user = (
+            await session.execute(
+                select(User.email, User.is_active).where(
+                    User.id == rotated.user_id
+                )
+            )
+        ).first()
+
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Invalid refresh token',
+        )
+
+    await session.commit()
+    access_token = create_access_token(
+        data={'sub': user.email, 'sid': rotated.id},
+        snapshot=authorization_cache.get(rotated.user_id),
+    )
+
+    return JWTToken(
+        access_token=access_token,
+        token_type='Bearer',
+        refresh_token=refresh_token,
+        session_id=rotated.id,
     )
 
 
+@auth_router.post('/logout', response_model=Response)
+async def logout(
+    user: CurrentUser,
+    session: Session,
+    token: Annotated[str, Depends(oauth2_scheme)],
+):
+    """
+    Revoke the access token sent with this request and sign its device
+    out, so its refresh token can no longer be used either.
+    """
+    claims = decode_access_token(token)
+    if 'jti' not in claims:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Token cannot be revoked',
+        )
+
+    if 'sid' in claims:
+        await session.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.id == claims['sid'],
+                RefreshToken.user_id == user.id,
+                RefreshToken.revoked_at.is_(None),
+            )
+            .values(revoked_at=utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    # Commits the refresh token update too
+    await revocation_list.revoke(
+        session, expires_at=claims['exp'], jti=claims['jti']
+    )
+    return {'message': 'Token revoked'}
+
+
+@auth_router.get('/sessions', response_model=RefreshSessionListSchema)
+async def list_sessions(user: CurrentUser, session: Session):
+    """
+    List the devices signed in as the current user.
+    """
+    sessions = await session.scalars(
+        select(RefreshToken)
+        .where(
+            RefreshToken.user_id == user.id,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > utcnow(),
+        )
+        .order_by(RefreshToken.id)
+    )
+    return {'sessions': sessions.all()}
+
+
+@auth_router.delete('/sessions/{session_id}', response_model=Response)
+async def revoke_session(session_id: int, user: CurrentUser, session: Session):
+    """
+    Sign a device out: its refresh token can no longer be used.
+    """
+    revoked = await session.scalar(
+        update(RefreshToken)
+        .where(
+            RefreshToken.id == session_id,
+            RefreshToken.user_id == user.id,
+            RefreshToken.revoked_at.is_(None),
+        )
+        .values(revoked_at=utcnow())
+        .returning(RefreshToken.id)
+        .execution_options(synchronize_session=False)
+    )
+    if revoked is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Session not found'
+        )
+
+    await session.commit()
+    return {'message': 'Session revoked'}
+
+
 @auth_router.post('/refresh_token', response_model=JWTToken)
-async def refresh_access_token(user: CurrentUser):
-    new_access_token = create_access_token(data={'sub': user.email})
+async def refresh_access_token(
+    user: CurrentUser,
+    session: Session,
+    token: Annotated[str, Depends(oauth2_scheme)],
+):
+    # The SQL engine does not use the user's permission graph
+    if settings.AUTHORIZATION_ENGINE == 'sql':
+        snapshot = authorization_cache.get(user.id)
+    else:
+        snapshot = await load_authorization_snapshot(session, user)
+    data = {'sub': user.email}
+    # The new token belongs to the same device session
+    sid = decode_access_token(token).get('sid')
+    if sid is not None:
+        data['sid'] = sid
+    new_access_token = create_access_token(data=data, snapshot=snapshot)
 
     return {'access_token': new_access_token, 'token_type': 'Bearer'}
 
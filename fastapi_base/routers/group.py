@@ -6,24 +6,45 @@ from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
+    Query,
+    Request,
 )
-from sqlalchemy import select
+from fastapi import Response as HTTPResponse
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from fastapi_base.database import get_session
-from fastapi_base.models import Group, Role, User
+from fastapi_base.authorization import (
+    affected_user_ids,
+    commit_authorization_change,
+)
+from fastapi_base.caching import conditional_get
+from fastapi_base.database import existing_ids, get_session, insert_ignore
+from fastapi_base.models import Group, Role, User, group_roles, user_groups
+from fastapi_base.responses import fast_list_response
+from fastapi_base.schemas.filters import CursorParams
 from fastapi_base.schemas.group import (
     GroupCreateSchema,
     GroupDetailsSchema,
     GroupListResponseSchema,
     GroupResponseSchema,
 )
+from fastapi_base.schemas.membership import (
+    MembershipBatchResponseSchema,
+    MembershipBatchSchema,
+)
 from fastapi_base.schemas.response import Response
 from fastapi_base.security import (
     require_permission,
 )
+from fastapi_base.settings import Settings
+from fastapi_base.streaming import (
+    ExportFormat,
+    attach_associations,
+    export_response,
+    export_rows,
+)
 
 groups_router = APIRouter(prefix='/groups', tags=['groups'])
 
@@ -32,6 +53,8 @@ CurrentUser = Annotated[User, Depends(require_permission('groups', 'create'))]
 
 logger = getLogger('uvicorn.error')
 
+settings = Settings()
+
 
 @groups_router.post(
     '/', response_model=GroupResponseSchema, status_code=HTTPStatus.CREATED
@@ -60,16 +83,61 @@ async def create_group(
 @groups_router.get('/', response_model=GroupListResponseSchema)
 async def get_groups(
     session: Session,
+    page: Annotated[CursorParams, Query()],
     current_user: Annotated[
         User, Depends(require_permission('groups', 'list'))
     ],
-    skip: int = 0,
-    limit: int = 100,
 ):
-    stmt = select(Group).offset(skip).limit(limit)
+    if settings.FAST_LIST_RESPONSES:
+        return await fast_list_response(
+            session, page, Group, GroupResponseSchema, 'groups'
+        )
+
+    stmt = page.paginate(select(Group), Group.id)
     result = await session.execute(stmt)
-    groups = result.scalars().all()
-    return {'groups': groups}
+    groups, next_cursor = page.split(result.scalars().all())
+    return {'groups': groups, 'next_cursor': next_cursor}
+
+
+async def _attach_role_ids(session: AsyncSession, rows) -> None:
+    await attach_associations(
+        session,
+        rows,
+        group_roles.c.group_id,
+        group_roles.c.role_id,
+        'role_ids',
+    )
+
+
+@groups_router.get('/export', status_code=HTTPStatus.OK)
+async def export_groups(
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('groups', 'list'))
+    ],
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+):
+    """
+    Stream every group, with the ids of its roles.
+    """
+    stmt = select(
+        Group.id,
+        Group.name,
+        Group.description,
+    ).order_by(Group.id)
+    fieldnames = [*stmt.selected_columns.keys(), 'role_ids']
+
+    return export_response(
+        export_rows(
+            session.bind,
+            stmt,
+            settings.EXPORT_PARTITION_SIZE,
+            enrich=_attach_role_ids,
+        ),
+        fieldnames,
+        export_format,
+        'groups',
+    )
 
 
 @groups_router.get('/{group_id}', response_model=GroupDetailsSchema)
@@ -79,11 +147,19 @@ async def get_group(
     current_user: Annotated[
         User, Depends(require_permission('groups', 'read'))
     ],
+    request: Request,
+    response: HTTPResponse,
 ):
+    await conditional_get(
+        session, Group, group_id, request, response, Group.users, Group.roles
+    )
+    # Group.users is loaded on demand only, so ask for it explicitly and
+    # overwrite any copy of the group already held by the identity map.
     stmt = (
         select(Group)
         .options(selectinload(Group.users), selectinload(Group.roles))
         .where(Group.id == group_id)
+        .execution_options(populate_existing=True)
     )
     result = await session.execute(stmt)
     group = result.scalar_one_or_none()
@@ -113,8 +189,10 @@ async def delete_group(
             status_code=HTTPStatus.NOT_FOUND, detail='Group not found'
         )
 
+    user_ids = await affected_user_ids(session, group_id=group_id)
+
     await session.delete(group)
-    await session.commit()
+    await commit_authorization_change(session, user_ids)
     return group
 
 
@@ -156,6 +234,91 @@ async def update_group(
     return db_group
 
 
+async def _ensure_group_exists(session: AsyncSession, group_id: int) -> None:
+    if await session.scalar(select(Group.id).where(Group.id == group_id)):
+        return
+    raise HTTPException(
+        status_code=HTTPStatus.NOT_FOUND, detail='Group not found'
+    )
+
+
+@groups_router.post(
+    '/{group_id}/users/batch',
+    status_code=HTTPStatus.OK,
+    response_model=MembershipBatchResponseSchema,
+)
+async def add_users_to_group(
+    group_id: int,
+    batch: MembershipBatchSchema,
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('groups', 'add_user'))
+    ],
+):
+    """
+    Add many users to a group with a single insert. Users already in the
+    group are skipped; ids of users that do not exist are returned in
+    ``missing_ids``.
+    """
+    await _ensure_group_exists(session, group_id)
+    user_ids = await existing_ids(session, User.id, batch.ids)
+
+    added = []
+    if user_ids:
+        stmt = (
+            insert_ignore(session, user_groups)
+            .values([
+                {'group_id': group_id, 'user_id': user_id}
+                for user_id in sorted(user_ids)
+            ])
+            .returning(user_groups.c.user_id)
+        )
+        added = (await session.scalars(stmt)).all()
+    await commit_authorization_change(session, added)
+
+    return {
+        'message': f'{len(added)} user(s) added to group',
+        'count': len(added),
+        'missing_ids': sorted(set(batch.ids) - user_ids),
+    }
+
+
+@groups_router.delete(
+    '/{group_id}/users/batch',
+    status_code=HTTPStatus.OK,
+    response_model=MembershipBatchResponseSchema,
+)
+async def remove_users_from_group(
+    group_id: int,
+    batch: MembershipBatchSchema,
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('groups', 'remove_user'))
+    ],
+):
+    """
+    Remove many users from a group with a single delete. Ids that were not
+    members of the group are returned in ``missing_ids``.
+    """
+    await _ensure_group_exists(session, group_id)
+    stmt = (
+        delete(user_groups)
+        .where(
+            user_groups.c.group_id == group_id,
+            user_groups.c.user_id.in_(batch.ids),
+        )
+        .returning(user_groups.c.user_id)
+    )
+    removed = (await session.scalars(stmt)).all()
+    await commit_authorization_change(session, removed)
+
+    return {
+        'message': f'{len(removed)} user(s) removed from group',
+        'count': len(removed),
+        'missing_ids': sorted(set(batch.ids) - set(removed)),
+    }
+
+
 @groups_router.post(
     '/{group_id}/users/{user_id}',
     status_code=HTTPStatus.OK,
@@ -169,35 +332,24 @@ async def add_user_to_group(
         User, Depends(require_permission('groups', 'add_user'))
     ],
 ):
-    stmt = (
-        select(Group)
-        .options(selectinload(Group.users))
-        .where(Group.id == group_id)
-    )
-    result = await session.execute(stmt)
-    group = result.scalar_one_or_none()
+    await _ensure_group_exists(session, group_id)
 
-    if not group:
+    if not await session.scalar(select(User.id).where(User.id == user_id)):
         raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='Group not found'
+            status_code=HTTPStatus.NOT_FOUND, detail='User not found'
         )
 
-    if any(user.id == user_id for user in group.users):
+    stmt = (
+        insert_ignore(session, user_groups)
+        .values(group_id=group_id, user_id=user_id)
+        .returning(user_groups.c.user_id)
+    )
+    if await session.scalar(stmt) is None:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT, detail='User already in group'
         )
 
-    user = await session.get(User, user_id)
-
-    if not user:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='User not found'
-        )
-
-    group.users.append(user)
-    session.add(group)
-    await session.commit()
-    await session.refresh(group)
+    await commit_authorization_change(session, [user_id])
     return {'message': 'User added to group successfully'}
 
 
@@ -211,31 +363,106 @@ async def remove_user_from_group(
     user_id: int,
     session: Session,
 ):
+    await _ensure_group_exists(session, group_id)
+
     stmt = (
-        select(Group)
-        .options(selectinload(Group.users))
-        .where(Group.id == group_id)
+        delete(user_groups)
+        .where(
+            user_groups.c.group_id == group_id,
+            user_groups.c.user_id == user_id,
+        )
+        .returning(user_groups.c.user_id)
     )
-    result = await session.execute(stmt)
-    group = result.scalar_one_or_none()
-
-    if not group:
+    if await session.scalar(stmt) is None:
         raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='Group not found'
+            status_code=HTTPStatus.NOT_FOUND, detail='User not found in group'
         )
 
-    user = next((u for u in group.users if u.id == user_id), None)
+    await commit_authorization_change(session, [user_id])
+    return {'message': 'User removed from group successfully'}
+
 
-    if not user:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='User not found in group'
+@groups_router.post(
+    '/{group_id}/roles/batch',
+    status_code=HTTPStatus.OK,
+    response_model=MembershipBatchResponseSchema,
+)
+async def assign_roles_to_group(
+    group_id: int,
+    batch: MembershipBatchSchema,
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('groups', 'assign_role'))
+    ],
+):
+    """
+    Assign many roles to a group with a single insert. Roles already
+    assigned are skipped; ids of roles that do not exist are returned in
+    ``missing_ids``.
+    """
+    await _ensure_group_exists(session, group_id)
+    role_ids = await existing_ids(session, Role.id, batch.ids)
+
+    added = []
+    if role_ids:
+        stmt = (
+            insert_ignore(session, group_roles)
+            .values([
+                {'group_id': group_id, 'role_id': role_id}
+                for role_id in sorted(role_ids)
+            ])
+            .returning(group_roles.c.role_id)
         )
+        added = (await session.scalars(stmt)).all()
+    user_ids = set()
+    if added:
+        user_ids = await affected_user_ids(session, group_id=group_id)
+    await commit_authorization_change(session, user_ids)
 
-    group.users.remove(user)
-    session.add(group)
-    await session.commit()
-    await session.refresh(group)
-    return {'message': 'User removed from group successfully'}
+    return {
+        'message': f'{len(added)} role(s) assigned to group',
+        'count': len(added),
+        'missing_ids': sorted(set(batch.ids) - role_ids),
+    }
+
+
+@groups_router.delete(
+    '/{group_id}/roles/batch',
+    status_code=HTTPStatus.OK,
+    response_model=MembershipBatchResponseSchema,
+)
+async def remove_roles_from_group(
+    group_id: int,
+    batch: MembershipBatchSchema,
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('groups', 'remove_role'))
+    ],
+):
+    """
+    Remove many roles from a group with a single delete. Ids of roles that
+    were not assigned to the group are returned in ``missing_ids``.
+    """
+    await _ensure_group_exists(session, group_id)
+    stmt = (
+        delete(group_roles)
+        .where(
+            group_roles.c.group_id == group_id,
+            group_roles.c.role_id.in_(batch.ids),
+        )
+        .returning(group_roles.c.role_id)
+    )
+    removed = (await session.scalars(stmt)).all()
+    user_ids = set()
+    if removed:
+        user_ids = await affected_user_ids(session, group_id=group_id)
+    await commit_authorization_change(session, user_ids)
+
+    return {
+        'message': f'{len(removed)} role(s) removed from group',
+        'count': len(removed),
+        'missing_ids': sorted(set(batch.ids) - set(removed)),
+    }
 
 
 @groups_router.post(
@@ -251,36 +478,27 @@ async def assign_role_to_group(
         User, Depends(require_permission('groups', 'assign_role'))
     ],
 ):
-    stmt = (
-        select(Group)
-        .options(selectinload(Group.roles))
-        .where(Group.id == group_id)
-    )
-    result = await session.execute(stmt)
-    group = result.scalar_one_or_none()
+    await _ensure_group_exists(session, group_id)
 
-    if not group:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='Group not found'
-        )
-
-    role = await session.get(Role, role_id)
-
-    if not role:
+    if not await session.scalar(select(Role.id).where(Role.id == role_id)):
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Role not found'
         )
 
-    if role in group.roles:
+    stmt = (
+        insert_ignore(session, group_roles)
+        .values(group_id=group_id, role_id=role_id)
+        .returning(group_roles.c.role_id)
+    )
+    if await session.scalar(stmt) is None:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
             detail='Role already assigned to group',
         )
 
-    group.roles.append(role)
-    session.add(group)
-    await session.commit()
-    await session.refresh(group)
+    await commit_authorization_change(
+        session, await affected_user_ids(session, group_id=group_id)
+    )
     return {'message': 'Role assigned to group successfully'}
 
 
@@ -297,28 +515,22 @@ async def remove_role_from_group(
         User, Depends(require_permission('groups', 'remove_role'))
     ],
 ):
-    stmt = (
-        select(Group)
-        .options(selectinload(Group.roles))
-        .where(Group.id == group_id)
-    )
-    result = await session.execute(stmt)
-    group = result.scalar_one_or_none()
+    await _ensure_group_exists(session, group_id)
 
-    if not group:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='Group not found'
+    stmt = (
+        delete(group_roles)
+        .where(
+            group_roles.c.group_id == group_id,
+            group_roles.c.role_id == role_id,
         )
-
-    role = next((r for r in group.roles if r.id == role_id), None)
-
-    if not role:
+        .returning(group_roles.c.role_id)
+    )
+    if await session.scalar(stmt) is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Role not found in group'
         )
 
-    group.roles.remove(role)
-    session.add(group)
-    await session.commit()
-    await session.refresh(group)
+    await commit_authorization_change(
+        session, await affected_user_ids(session, group_id=group_id)
+    )
     return {'message': 'Role removed from group successfully'}
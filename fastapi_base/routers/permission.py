@@ -4,17 +4,26 @@ from typing import Annotated
 
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     HTTPException,
+    Query,
     Request,
 )
+from fastapi import Response as HTTPResponse
 from sqlalchemy import delete, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi_base.database import get_session
-from fastapi_base.models import Permission, Role, User
+from fastapi_base.audit import audit_writer
+from fastapi_base.authorization import (
+    affected_user_ids,
+    commit_authorization_change,
+)
+from fastapi_base.caching import conditional_get
+from fastapi_base.database import get_session, insert_ignore
+from fastapi_base.models import Permission, Role, User, role_permissions
+from fastapi_base.responses import fast_list_response
+from fastapi_base.schemas.filters import CursorParams
 from fastapi_base.schemas.permission import (
     PermissionCreateSchema,
     PermissionListResponseSchema,
@@ -22,9 +31,14 @@ from fastapi_base.schemas.permission import (
 )
 from fastapi_base.schemas.response import Response
 from fastapi_base.security import (
-    create_audit_log,
     require_permission,
 )
+from fastapi_base.settings import Settings
+from fastapi_base.streaming import (
+    ExportFormat,
+    export_response,
+    export_rows,
+)
 
 permissions_router = APIRouter(prefix='/permissions', tags=['permissions'])
 
@@ -35,6 +49,8 @@ CurrentUser = Annotated[
 
 logger = getLogger('uvicorn.error')
 
+settings = Settings()
+
 
 @permissions_router.post(
     '/',
@@ -43,7 +59,6 @@ logger = getLogger('uvicorn.error')
 )
 async def create_permission(
     permission: PermissionCreateSchema,
-    background_tasks: BackgroundTasks,
     session: Session,
     current_user: Annotated[
         User, Depends(require_permission('permissions', 'create'))
@@ -57,9 +72,7 @@ async def create_permission(
         await session.refresh(db_permission)
 
         # Log permission creation in background
-        background_tasks.add_task(
-            create_audit_log,
-            db=session,
+        await audit_writer.submit(
             user_id=current_user.id,
             action='create',
             resource_type='permissions',
@@ -80,16 +93,49 @@ async def create_permission(
 @permissions_router.get('/', response_model=PermissionListResponseSchema)
 async def get_permissions(
     session: Session,
+    page: Annotated[CursorParams, Query()],
     current_user: Annotated[
         User, Depends(require_permission('permissions', 'list'))
     ],
-    skip: int = 0,
-    limit: int = 100,
 ):
-    stmt = select(Permission).offset(skip).limit(limit)
+    if settings.FAST_LIST_RESPONSES:
+        return await fast_list_response(
+            session, page, Permission, PermissionResponseSchema, 'permissions'
+        )
+
+    stmt = page.paginate(select(Permission), Permission.id)
     result = await session.execute(stmt)
-    permissions = result.scalars().all()
-    return {'permissions': permissions}
+    permissions, next_cursor = page.split(result.scalars().all())
+    return {'permissions': permissions, 'next_cursor': next_cursor}
+
+
+@permissions_router.get('/export', status_code=HTTPStatus.OK)
+async def export_permissions(
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('permissions', 'list'))
+    ],
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+):
+    """
+    Stream every permission.
+    """
+    stmt = select(
+        Permission.id,
+        Permission.name,
+        Permission.resource,
+        Permission.action,
+        Permission.description,
+        Permission.conditions,
+    ).order_by(Permission.id)
+    fieldnames = [*stmt.selected_columns.keys()]
+
+    return export_response(
+        export_rows(session.bind, stmt, settings.EXPORT_PARTITION_SIZE),
+        fieldnames,
+        export_format,
+        'permissions',
+    )
 
 
 @permissions_router.get(
@@ -101,7 +147,12 @@ async def get_permission(
     current_user: Annotated[
         User, Depends(require_permission('permissions', 'read'))
     ],
+    request: Request,
+    response: HTTPResponse,
 ):
+    await conditional_get(
+        session, Permission, permission_id, request, response
+    )
     stmt = select(Permission).where(Permission.id == permission_id)
     result = await session.execute(stmt)
     db_permission = result.scalars().first()
@@ -119,7 +170,6 @@ async def get_permission(
 async def update_permission(
     permission_id: int,
     permission_update: PermissionCreateSchema,
-    background_tasks: BackgroundTasks,
     session: Session,
     current_user: Annotated[
         User, Depends(require_permission('permissions', 'update'))
@@ -142,7 +192,10 @@ async def update_permission(
             .values(**update_data)
         )
         await session.execute(stmt)
-        await session.commit()
+        await commit_authorization_change(
+            session,
+            await affected_user_ids(session, permission_id=permission_id),
+        )
 
         # Refresh permission data
         stmt = select(Permission).where(Permission.id == permission_id)
@@ -150,9 +203,7 @@ async def update_permission(
         db_permission = result.scalars().first()
 
         # Log permission update in background
-        background_tasks.add_task(
-            create_audit_log,
-            db=session,
+        await audit_writer.submit(
             user_id=current_user.id,
             action='update',
             resource_type='permissions',
@@ -173,7 +224,6 @@ async def update_permission(
 @permissions_router.delete('/{permission_id}', status_code=HTTPStatus.OK)
 async def delete_permission(
     permission_id: int,
-    background_tasks: BackgroundTasks,
     session: Session,
     current_user: Annotated[
         User, Depends(require_permission('permissions', 'delete'))
@@ -194,14 +244,14 @@ async def delete_permission(
         'action': db_permission.action,
     }
 
+    user_ids = await affected_user_ids(session, permission_id=permission_id)
+
     stmt = delete(Permission).where(Permission.id == permission_id)
     await session.execute(stmt)
-    await session.commit()
+    await commit_authorization_change(session, user_ids)
 
     # Log permission deletion in background
-    background_tasks.add_task(
-        create_audit_log,
-        db=session,
+    await audit_writer.submit(
         user_id=current_user.id,
         action='delete',
         resource_type='permissions',
@@ -221,40 +271,41 @@ async def delete_permission(
 async def assign_permission_to_role(
     permission_id: int,
     role_id: int,
-    background_tasks: BackgroundTasks,
     session: Session,
     current_user: Annotated[
         User, Depends(require_permission('permissions', 'assign'))
     ],
     request: Request = None,
 ):
-    # Check if permission exists
-    permission_stmt = select(Permission).where(Permission.id == permission_id)
-    permission_result = await session.execute(permission_stmt)
-    permission = permission_result.scalars().first()
+    permission_name = await session.scalar(
+        select(Permission.name).where(Permission.id == permission_id)
+    )
 
-    if permission is None:
+    if permission_name is None:
         raise HTTPException(status_code=404, detail='Permission not found')
 
-    # Check if role exists
-    role_stmt = select(Role).where(Role.id == role_id)
-    role_result = await session.execute(role_stmt)
-    role = role_result.scalars().first()
+    role_name = await session.scalar(
+        select(Role.name).where(Role.id == role_id)
+    )
 
-    if role is None:
+    if role_name is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Role not found'
         )
 
     # Add permission to role if not already assigned
-    if permission not in role.permissions:
-        role.permissions.append(permission)
-        await session.commit()
+    stmt = (
+        insert_ignore(session, role_permissions)
+        .values(role_id=role_id, permission_id=permission_id)
+        .returning(role_permissions.c.permission_id)
+    )
+    if await session.scalar(stmt) is not None:
+        await commit_authorization_change(
+            session, await affected_user_ids(session, role_id=role_id)
+        )
 
         # Log assignment in background
-        background_tasks.add_task(
-            create_audit_log,
-            db=session,
+        await audit_writer.submit(
             user_id=current_user.id,
             action='assign',
             resource_type='permissions',
@@ -264,6 +315,6 @@ async def assign_permission_to_role(
         )
 
     return {
-        'message': f"Permission '{permission.name}'"
-        f" assigned to role '{role.name}'"
+        'message': f"Permission '{permission_name}'"
+        f" assigned to role '{role_name}'"
     }
@@ -4,17 +4,30 @@ from typing import Annotated
 
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     HTTPException,
+    Query,
     Request,
+    Response,
 )
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi_base.database import get_session
-from fastapi_base.models import Role, User
+from fastapi_base.audit import audit_writer
+from fastapi_base.authorization import (
+    affected_user_ids,
+    commit_authorization_change,
+)
+from fastapi_base.caching import conditional_get
+from fastapi_base.database import existing_ids, get_session, insert_ignore
+from fastapi_base.models import Permission, Role, User, role_permissions
+from fastapi_base.responses import fast_list_response
+from fastapi_base.schemas.filters import CursorParams
+from fastapi_base.schemas.membership import (
+    MembershipBatchResponseSchema,
+    MembershipBatchSchema,
+)
 from fastapi_base.schemas.role import (
     RoleCreateSchema,
     RoleListResponseSchema,
@@ -22,9 +35,15 @@ from fastapi_base.schemas.role import (
     RoleUpdateSchema,
 )
 from fastapi_base.security import (
-    create_audit_log,
     require_permission,
 )
+from fastapi_base.settings import Settings
+from fastapi_base.streaming import (
+    ExportFormat,
+    attach_associations,
+    export_response,
+    export_rows,
+)
 
 roles_router = APIRouter(prefix='/roles', tags=['roles'])
 
@@ -33,13 +52,14 @@ CurrentUser = Annotated[User, Depends(require_permission('roles', 'create'))]
 
 logger = getLogger('uvicorn.error')
 
+settings = Settings()
+
 
 @roles_router.post(
     '/', response_model=RoleResponseSchema, status_code=HTTPStatus.CREATED
 )
 async def create_role(
     role: RoleCreateSchema,
-    background_tasks: BackgroundTasks,
     session: Session,
     current_user: Annotated[
         User, Depends(require_permission('roles', 'create'))
@@ -53,9 +73,7 @@ async def create_role(
         await session.refresh(db_role)
 
         # Log role creation in background
-        background_tasks.add_task(
-            create_audit_log,
-            db=session,
+        await audit_writer.submit(
             user_id=current_user.id,
             action='create',
             resource_type='roles',
@@ -78,16 +96,61 @@ async def create_role(
 )
 async def get_roles(
     session: Session,
+    page: Annotated[CursorParams, Query()],
     current_user: Annotated[
         User, Depends(require_permission('roles', 'list'))
     ],
-    skip: int = 0,
-    limit: int = 100,
 ):
-    stmt = select(Role).offset(skip).limit(limit)
+    if settings.FAST_LIST_RESPONSES:
+        return await fast_list_response(
+            session, page, Role, RoleResponseSchema, 'roles'
+        )
+
+    stmt = page.paginate(select(Role), Role.id)
     result = await session.execute(stmt)
-    roles = result.scalars().all()
-    return {'roles': roles}
+    roles, next_cursor = page.split(result.scalars().all())
+    return {'roles': roles, 'next_cursor': next_cursor}
+
+
+async def _attach_permission_ids(session: AsyncSession, rows) -> None:
+    await attach_associations(
+        session,
+        rows,
+        role_permissions.c.role_id,
+        role_permissions.c.permission_id,
+        'permission_ids',
+    )
+
+
+@roles_router.get('/export', status_code=HTTPStatus.OK)
+async def export_roles(
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('roles', 'list'))
+    ],
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+):
+    """
+    Stream every role, with the ids of its permissions.
+    """
+    stmt = select(
+        Role.id,
+        Role.name,
+        Role.description,
+    ).order_by(Role.id)
+    fieldnames = [*stmt.selected_columns.keys(), 'permission_ids']
+
+    return export_response(
+        export_rows(
+            session.bind,
+            stmt,
+            settings.EXPORT_PARTITION_SIZE,
+            enrich=_attach_permission_ids,
+        ),
+        fieldnames,
+        export_format,
+        'roles',
+    )
 
 
 @roles_router.get('/{role_id}', response_model=RoleResponseSchema)
@@ -97,7 +160,10 @@ async def get_role(
     current_user: Annotated[
         User, Depends(require_permission('roles', 'read'))
     ],
+    request: Request,
+    response: Response,
 ):
+    await conditional_get(session, Role, role_id, request, response)
     stmt = select(Role).where(Role.id == role_id)
     result = await session.execute(stmt)
     role = result.scalar_one_or_none()
@@ -127,8 +193,10 @@ async def delete_role(
             status_code=HTTPStatus.NOT_FOUND, detail='Role not found'
         )
 
+    user_ids = await affected_user_ids(session, role_id=role_id)
+
     await session.delete(role)
-    await session.commit()
+    await commit_authorization_change(session, user_ids)
 
     return role
 
@@ -137,7 +205,6 @@ async def delete_role(
 async def update_role(
     role_id: int,
     role_update: RoleUpdateSchema,
-    background_tasks: BackgroundTasks,
     session: Session,
     current_user: Annotated[
         User, Depends(require_permission('roles', 'update'))
@@ -163,9 +230,7 @@ async def update_role(
         await session.refresh(db_role)
 
         # Log role update in background
-        background_tasks.add_task(
-            create_audit_log,
-            db=session,
+        await audit_writer.submit(
             user_id=current_user.id,
             action='update',
             resource_type='roles',
@@ -180,3 +245,117 @@ async def update_role(
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT, detail='Role name already exists'
         )
+
+
+async def _ensure_role_exists(session: AsyncSession, role_id: int) -> None:
+    if await session.scalar(select(Role.id).where(Role.id == role_id)):
+        return
+    raise HTTPException(
+        status_code=HTTPStatus.NOT_FOUND, detail='Role not found'
+    )
+
+
+@roles_router.post(
+    '/{role_id}/permissions/batch',
+    status_code=HTTPStatus.OK,
+    response_model=MembershipBatchResponseSchema,
+)
+async def assign_permissions_to_role(
+    role_id: int,
+    batch: MembershipBatchSchema,
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('permissions', 'assign'))
+    ],
+    request: Request = None,
+):
+    """
+    Assign many permissions to a role with a single insert. Permissions
+    already assigned are skipped; ids of permissions that do not exist are
+    returned in ``missing_ids``.
+    """
+    await _ensure_role_exists(session, role_id)
+    permission_ids = await existing_ids(session, Permission.id, batch.ids)
+
+    added = []
+    if permission_ids:
+        stmt = (
+            insert_ignore(session, role_permissions)
+            .values([
+                {'role_id': role_id, 'permission_id': permission_id}
+                for permission_id in sorted(permission_ids)
+            ])
+            .returning(role_permissions.c.permission_id)
+        )
+        added = (await session.scalars(stmt)).all()
+    user_ids = set()
+    if added:
+        user_ids = await affected_user_ids(session, role_id=role_id)
+    await commit_authorization_change(session, user_ids)
+
+    if added:
+        await audit_writer.submit(
+            user_id=current_user.id,
+            action='assign',
+            resource_type='roles',
+            resource_id=role_id,
+            details={'permission_ids': sorted(added)},
+            ip_address=request.client.host if request else None,
+        )
+
+    return {
+        'message': f'{len(added)} permission(s) assigned to role',
+        'count': len(added),
+        'missing_ids': sorted(set(batch.ids) - permission_ids),
+    }
+
+
+@roles_router.delete(
+    '/{role_id}/permissions/batch',
+    status_code=HTTPStatus.OK,
+    response_model=MembershipBatchResponseSchema,
+)
+async def remove_permissions_from_role(
+    role_id: int,
+    batch: MembershipBatchSchema,
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('permissions', 'assign'))
+    ],
+    request: Request = None,
+):
+    """
+    Remove many permissions from a role with a single delete. Ids of
+    permissions that were not assigned to the role are returned in
+    ``missing_ids``.
+    """
+    await _ensure_role_exists(session, role_id)
+    stmt = (
+        delete(role_permissions)
+        .where(
+            role_permissions.c.role_id == role_id,
+            role_permissions.c.permission_id.in_(batch.ids),
+        )
+        .returning(role_permissions.c.permission_id)
+    )
+    removed = (await session.scalars(stmt)).all()
+    user_ids = set()
+    if removed:
+        user_ids = await affected_user_ids(session, role_id=role_id)
+    await commit_authorization_change(session, user_ids)
+
+    if removed:
+        await audit_writer.submit(
+            user_id=current_user.id,
+            action='unassign',
+            resource_type='roles',
+            resource_id=role_id,
+            details={'permission_ids': sorted(removed)},
+            ip_address=request.client.host if request else None,
+        )
+
+    return {
+        'message': f'{len(removed)} permission(s) removed from role',
+        'count': len(removed),
+        'missing_ids': sorted(set(batch.ids) - set(removed)),
+    }
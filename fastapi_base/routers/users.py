@@ -1,35 +1,60 @@
+import asyncio
 from http import HTTPStatus
 from logging import getLogger
-from typing import Annotated
+from typing import Annotated, Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     HTTPException,
     Query,
     Request,
 )
+from fastapi import Response as HTTPResponse
+from pydantic import ValidationError
 from sqlalchemy import delete, select, update
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
-from fastapi_base.database import get_session
-from fastapi_base.models import User
-from fastapi_base.schemas.filters import FilterParams
+from fastapi_base.audit import audit_writer
+from fastapi_base.authorization import (
+    authorization_cache,
+    commit_authorization_change,
+)
+from fastapi_base.caching import conditional_get
+from fastapi_base.database import get_session, insert_ignore
+from fastapi_base.models import RefreshToken, User, user_groups, user_roles
+from fastapi_base.responses import fast_list_response
+from fastapi_base.revocation import revocation_list
+from fastapi_base.schemas.filters import CursorParams
 from fastapi_base.schemas.response import Response
 from fastapi_base.schemas.user import (
     UserCreateSchema,
     UserDetailsSchema,
+    UserImportSchema,
     UserListResponseSchema,
     UserResponseSchema,
     UserUpdateSchema,
 )
 from fastapi_base.security import (
-    create_audit_log,
+    bulk_hash_pool,
     get_password_hash,
+    get_password_hash_async,
     require_permission,
 )
+from fastapi_base.settings import Settings
+from fastapi_base.streaming import (
+    NDJSON_MEDIA_TYPE,
+    DuplexStreamingResponse,
+    ExportFormat,
+    attach_associations,
+    export_response,
+    export_rows,
+    iter_records,
+    ndjson_lines,
+    request_media_type,
+)
+from fastapi_base.tokens import to_epoch, utcnow
 
 users_router = APIRouter(prefix='/users', tags=['users'])
 
@@ -38,13 +63,17 @@ CurrentUser = Annotated[User, Depends(require_permission('users', 'create'))]
 
 logger = getLogger('uvicorn.error')
 
+settings = Settings()
+
+# (line number, validated user or None, errors)
+BulkRow = Tuple[int, Optional[UserImportSchema], List[Any]]
+
 
 @users_router.post(
     '/', status_code=HTTPStatus.CREATED, response_model=UserResponseSchema
 )
 async def create_user(
     user: UserCreateSchema,
-    background_tasks: BackgroundTasks,
     session: Session,
     # current_user: User = Depends(require_permission("users", "create")),
     request: Request = None,
@@ -52,16 +81,14 @@ async def create_user(
     try:
         db_user = User(
             username=user.username,
-            password=get_password_hash(user.password),
+            password=await get_password_hash_async(user.password),
             email=user.email,
         )
         session.add(db_user)
         await session.commit()
         await session.refresh(db_user)
 
-        background_tasks.add_task(
-            create_audit_log,
-            db=session,
+        await audit_writer.submit(
             user_id=db_user.id,
             action='create',
             resource_type='users',
@@ -79,20 +106,219 @@ async def create_user(
         )
 
 
+async def _import_users(
+    session: AsyncSession, rows: List[BulkRow]
+) -> List[Dict[str, Any]]:
+    """
+    Insert one chunk of bulk rows with a single multi-row statement and
+    return the result of each row, in input order.
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    pending = []
+    usernames, emails = set(), set()
+    for line, user, errors in rows:
+        if user is None:
+            results[line] = {
+                'line': line,
+                'status': 'invalid',
+                'errors': errors,
+            }
+        elif user.username in usernames or user.email in emails:
+            results[line] = {'line': line, 'status': 'conflict'}
+        else:
+            usernames.add(user.username)
+            emails.add(user.email)
+            pending.append((line, user))
+
+    if pending:
+        hashes = await asyncio.gather(
+            *(
+                bulk_hash_pool.run(get_password_hash, user.password)
+                for _, user in pending
+            )
+        )
+        stmt = (
+            insert_ignore(session, User.__table__)
+            .values([
+                {
+                    'username': user.username,
+                    'email': user.email,
+                    'password': password,
+                    'is_active': True,
+                    'is_superuser': False,
+                }
+                for (_, user), password in zip(pending, hashes)
+            ])
+            .returning(User.__table__.c.id, User.__table__.c.username)
+        )
+        try:
+            created = {
+                row.username: row.id for row in await session.execute(stmt)
+            }
+            await session.commit()
+        except DBAPIError as exc:
+            # Only unique violations are skipped by the insert; any other
+            # failure rejects the whole chunk, which is reported and the
+            # import goes on with the next one
+            await session.rollback()
+            logger.warning(f'Bulk import chunk failed: {exc.orig}')
+            for line, _ in pending:
+                results[line] = {'line': line, 'status': 'error'}
+            pending = []
+
+        for line, user in pending:
+            if user.username in created:
+                results[line] = {
+                    'line': line,
+                    'status': 'created',
+                    'id': created[user.username],
+                }
+            else:
+                results[line] = {'line': line, 'status': 'conflict'}
+
+    return [results[line] for line, _, _ in rows]
+
+
+def _bulk_row(
+    line: int, record: Optional[Dict[str, Any]], error: Optional[str]
+) -> BulkRow:
+    if error is not None:
+        return line, None, [{'loc': [], 'msg': error}]
+    try:
+        return line, UserImportSchema(**record), []
+    except ValidationError as exc:
+        errors = [
+            {'loc': list(e['loc']), 'msg': e['msg']} for e in exc.errors()
+        ]
+        return line, None, errors
+
+
+async def _bulk_import(
+    request: Request,
+    bind: AsyncEngine,
+    user_id: int,
+) -> AsyncIterator[str]:
+    """
+    Import the request body chunk by chunk, yielding the NDJSON results of
+    each chunk once it is committed.
+
+    The import owns its session because the response body is produced
+    after the request dependencies have been closed.
+    """
+    ip_address = request.client.host if request.client else None
+    chunk: List[BulkRow] = []
+
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+
+        async def flush() -> str:
+            results = await _import_users(session, chunk)
+            created = [r['id'] for r in results if r['status'] == 'created']
+            if created:
+                await audit_writer.submit(
+                    user_id=user_id,
+                    action='bulk_create',
+                    resource_type='users',
+                    details={'user_ids': created},
+                    ip_address=ip_address,
+                )
+            chunk.clear()
+            return ''.join(ndjson_lines(results))
+
+        async for record in iter_records(request):
+            chunk.append(_bulk_row(*record))
+            if len(chunk) >= settings.BULK_IMPORT_CHUNK_SIZE:
+                yield await flush()
+
+        if chunk:
+            yield await flush()
+
+
+@users_router.post('/bulk', status_code=HTTPStatus.OK)
+async def bulk_create_users(
+    request: Request,
+    session: Session,
+    current_user: CurrentUser,
+):
+    """
+    Create users from a streamed NDJSON or CSV body. Rows are validated
+    one by one and inserted in chunks; the response has one NDJSON result
+    per input row, streamed as each chunk is committed, so clients should
+    read it while they upload.
+    """
+    # Checked up front: once streaming starts the status cannot change
+    request_media_type(request)
+    return DuplexStreamingResponse(
+        _bulk_import(request, session.bind, current_user.id),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
 @users_router.get(
     '/', status_code=HTTPStatus.OK, response_model=UserListResponseSchema
 )
 async def list_users(
     session: Session,
-    filter_users: Annotated[FilterParams, Query()],
+    page: Annotated[CursorParams, Query()],
+    current_user: Annotated[
+        User, Depends(require_permission('users', 'list'))
+    ],
+):
+    if settings.FAST_LIST_RESPONSES:
+        return await fast_list_response(
+            session, page, User, UserResponseSchema, 'users'
+        )
+
+    users = await session.scalars(page.paginate(select(User), User.id))
+    users, next_cursor = page.split(users.all())
+    return {'users': users, 'next_cursor': next_cursor}
+
+
+async def _attach_memberships(session: AsyncSession, rows) -> None:
+    await attach_associations(
+        session, rows, user_roles.c.user_id, user_roles.c.role_id, 'role_ids'
+    )
+    await attach_associations(
+        session,
+        rows,
+        user_groups.c.user_id,
+        user_groups.c.group_id,
+        'group_ids',
+    )
+
+
+@users_router.get('/export', status_code=HTTPStatus.OK)
+async def export_users(
+    session: Session,
     current_user: Annotated[
         User, Depends(require_permission('users', 'list'))
     ],
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
 ):
-    users = await session.scalars(
-        select(User).offset(filter_users.offset).limit(filter_users.limit)
+    """
+    Stream every user, with the ids of their roles and groups.
+    """
+    stmt = select(
+        User.id,
+        User.username,
+        User.email,
+        User.is_active,
+        User.is_superuser,
+        User.created_at,
+        User.updated_at,
+    ).order_by(User.id)
+    fieldnames = [*stmt.selected_columns.keys(), 'role_ids', 'group_ids']
+
+    return export_response(
+        export_rows(
+            session.bind,
+            stmt,
+            settings.EXPORT_PARTITION_SIZE,
+            enrich=_attach_memberships,
+        ),
+        fieldnames,
+        export_format,
+        'users',
     )
-    return {'users': users.all()}
 
 
 @users_router.get(
@@ -106,7 +332,12 @@ async def read_user(
     current_user: Annotated[
         User, Depends(require_permission('users', 'read'))
     ],
+    request: Request,
+    response: HTTPResponse,
 ):
+    await conditional_get(
+        session, User, user_id, request, response, User.roles, User.groups
+    )
     db_user = await session.scalar(select(User).where(User.id == user_id))
 
     if not db_user:
@@ -127,7 +358,6 @@ async def update_user(
     user_id: int,
     user_update: UserUpdateSchema,
     session: Session,
-    background_tasks: BackgroundTasks,
     current_user: Annotated[
         User, Depends(require_permission('users', 'update'))
     ],
@@ -145,15 +375,13 @@ async def update_user(
         if update_data:
             stmt = update(User).where(User.id == user_id).values(**update_data)
             await session.execute(stmt)
-            await session.commit()
+            await commit_authorization_change(session, [user_id])
 
         stmt = select(User).where(User.id == user_id)
         result = await session.execute(stmt)
         db_user = result.scalars().first()
 
-        background_tasks.add_task(
-            create_audit_log,
-            db=session,
+        await audit_writer.submit(
             user_id=current_user.id,
             action='update',
             resource_type='users',
@@ -180,7 +408,6 @@ async def update_user(
 )
 async def delete_user(
     user_id: int,
-    background_tasks: BackgroundTasks,
     session: Session,
     current_user: Annotated[
         User, Depends(require_permission('users', 'delete'))
@@ -202,10 +429,9 @@ async def delete_user(
     stmt = delete(User).where(User.id == user_id)
     await session.execute(stmt)
     await session.commit()
+    authorization_cache.invalidate([user_id])
 
-    background_tasks.add_task(
-        create_audit_log,
-        db=session,
+    await audit_writer.submit(
         user_id=None,
         action='delete',
         resource_type='users',
@@ -215,3 +441,55 @@ async def delete_user(
     )
 
     return Response(message='User deleted successfully')
+
+
+@users_router.post(
+    '/{user_id}/tokens/revoke',
+    status_code=HTTPStatus.OK,
+    response_model=Response,
+)
+async def revoke_user_tokens(
+    user_id: int,
+    session: Session,
+    current_user: Annotated[
+        User, Depends(require_permission('users', 'update'))
+    ],
+    request: Request = None,
+):
+    """
+    Revoke every access token issued to a user so far and sign out all of
+    their devices.
+    """
+    email = await session.scalar(select(User.email).where(User.id == user_id))
+    if email is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='User not found'
+        )
+
+    now = utcnow()
+    await session.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None),
+        )
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    # Commits the refresh token update too
+    await revocation_list.revoke(
+        session,
+        expires_at=to_epoch(now) + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        subject=email,
+        not_before=to_epoch(now),
+    )
+
+    await audit_writer.submit(
+        user_id=current_user.id,
+        action='revoke_tokens',
+        resource_type='users',
+        resource_id=user_id,
+        ip_address=request.client.host if request else None,
+    )
+
+    return Response(message='User tokens revoked')
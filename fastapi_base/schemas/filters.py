@@ -1,4 +1,9 @@
-from pydantic import BaseModel, Field
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import Select
 
 from fastapi_base.models import TodoState
 
@@ -12,3 +17,65 @@ class FilterTodoParams(FilterParams):
     title: str | None = Field(None, min_length=3, max_length=20)
     description: str | None = Field(None, min_length=3, max_length=20)
     state: TodoState | None = None
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Build the opaque cursor that points right after the given id.
+    """
+    raw = json.dumps({'id': last_id}).encode()
+    return urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Return the id a cursor built by `encode_cursor` points after.
+    """
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        last_id = json.loads(urlsafe_b64decode(padded))['id']
+    except (ValueError, TypeError, KeyError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+    if not isinstance(last_id, int):
+        raise ValueError('Invalid cursor')
+    return last_id
+
+
+class CursorParams(BaseModel):
+    """
+    Keyset pagination: rows are ordered by id and each page starts right
+    after the last id of the previous one, so deep pages cost the same as
+    the first.
+    """
+
+    cursor: Optional[str] = None
+    limit: int = Field(gt=0, le=1000, default=100)
+
+    @field_validator('cursor')
+    @classmethod
+    def cursor_must_be_valid(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None:
+            decode_cursor(v)
+        return v
+
+    def paginate(self, stmt: Select, key) -> Select:
+        """
+        Restrict a select to this page. One extra row is fetched to know
+        whether another page follows.
+        """
+        if self.cursor is not None:
+            stmt = stmt.where(key > decode_cursor(self.cursor))
+        return stmt.order_by(key).limit(self.limit + 1)
+
+    def split(
+        self, rows: Sequence[Any], key: str = 'id'
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Split the rows fetched by `paginate` into the page and the cursor of
+        the next one, if any.
+        """
+        page = list(rows[: self.limit])
+        if len(rows) <= self.limit:
+            return page, None
+        return page, encode_cursor(getattr(page[-1], key))
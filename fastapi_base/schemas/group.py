@@ -27,3 +27,4 @@ class GroupDetailsSchema(GroupResponseSchema):
 
 class GroupListResponseSchema(BaseModel):
     groups: List[GroupResponseSchema]
+    next_cursor: Optional[str] = None
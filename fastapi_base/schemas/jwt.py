@@ -1,11 +1,32 @@
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class JWTToken(BaseModel):
     access_token: str  # O token JWT
     token_type: str  # O tipo do token, geralmente "bearer"
+    refresh_token: Optional[str] = None  # Token opaco, trocado a cada uso
+    session_id: Optional[int] = None  # Sessão do dispositivo, em /sessions
+
+
+class RefreshTokenSchema(BaseModel):
+    refresh_token: str
+
+
+class RefreshSessionSchema(BaseModel):
+    id: int
+    device: Optional[str] = None
+    created_at: datetime
+    last_used_at: Optional[datetime] = None
+    expires_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RefreshSessionListSchema(BaseModel):
+    sessions: List[RefreshSessionSchema]
 
 
 class TokenPayload(BaseModel):
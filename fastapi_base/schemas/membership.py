@@ -0,0 +1,20 @@
+from typing import List
+
+from pydantic import BaseModel, Field, field_validator
+
+MAX_BATCH_SIZE = 10_000
+
+
+class MembershipBatchSchema(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+    @field_validator('ids')
+    @classmethod
+    def unique_ids(cls, v: List[int]) -> List[int]:
+        return sorted(set(v))
+
+
+class MembershipBatchResponseSchema(BaseModel):
+    message: str
+    count: int
+    missing_ids: List[int] = []
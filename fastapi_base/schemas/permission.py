@@ -1,7 +1,8 @@
 from typing import Any, Dict, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
 
+from fastapi_base.conditions import compile_conditions
 from fastapi_base.schemas.role import RoleDetailsSchema
 
 
@@ -14,7 +15,13 @@ class PermissionBaseSchema(BaseModel):
 
 
 class PermissionCreateSchema(PermissionBaseSchema):
-    pass
+    @field_validator('conditions')
+    @classmethod
+    def conditions_must_compile(
+        cls, v: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        compile_conditions(v, strict=True)
+        return v
 
 
 class PermissionResponseSchema(PermissionBaseSchema):
@@ -25,6 +32,7 @@ class PermissionResponseSchema(PermissionBaseSchema):
 
 class PermissionListResponseSchema(BaseModel):
     permissions: list[PermissionResponseSchema]
+    next_cursor: Optional[str] = None
 
 
 RoleDetailsSchema.model_rebuild()
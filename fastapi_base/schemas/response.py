@@ -1,5 +1,19 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
 class Response(BaseModel):
     message: str
+
+
+class DatabasePoolStatus(BaseModel):
+    pool: str
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: Optional[int] = None
+    checkout_seconds: Optional[float] = None
+    max_checkout_seconds: Optional[float] = None
+    timeouts: Optional[int] = None
@@ -31,3 +31,4 @@ class RoleDetailsSchema(RoleResponseSchema):
 
 class RoleListResponseSchema(BaseModel):
     roles: List[RoleResponseSchema]
+    next_cursor: Optional[str] = None
@@ -1,11 +1,14 @@
 from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
 from fastapi_base.schemas.group import GroupResponseSchema
 from fastapi_base.schemas.role import RoleResponseSchema
 
 MIN_PASSWORD_LENGTH = 8
+# Column lengths of users.username and users.email
+USERNAME_MAX_LENGTH = 50
+EMAIL_MAX_LENGTH = 100
 
 
 class UserBaseSchema(BaseModel):
@@ -38,6 +41,16 @@ class UserCreateSchema(UserBaseSchema):
         return v
 
 
+class UserImportSchema(UserCreateSchema):
+    """
+    One bulk import row. Lengths are checked up front, since a row the
+    columns cannot hold would fail the whole multi-row insert.
+    """
+
+    username: str = Field(max_length=USERNAME_MAX_LENGTH)
+    email: EmailStr = Field(max_length=EMAIL_MAX_LENGTH)
+
+
 class UserResponseSchema(UserBaseSchema):
     id: int
     is_active: bool
@@ -47,6 +60,7 @@ class UserResponseSchema(UserBaseSchema):
 
 class UserListResponseSchema(BaseModel):
     users: List[UserResponseSchema]
+    next_cursor: Optional[str] = None
 
 
 class UserDetailsSchema(UserResponseSchema):
@@ -1,22 +1,40 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Dict, Optional
-from zoneinfo import ZoneInfo
 
 from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
-from jwt import DecodeError, ExpiredSignatureError, decode, encode
+from jwt import ExpiredSignatureError, InvalidTokenError
 from pwdlib import PasswordHash
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-
+from sqlalchemy.orm import raiseload
+
+from fastapi_base.authorization import (
+    AuthorizationSnapshot,
+    Principal,
+    authorization_cache,
+    compile_permissions,
+    has_permission_sql,
+    load_authorization_snapshot,
+)
 from fastapi_base.database import get_session
 from fastapi_base.exceptions.auth import (
     CredentialsException,
     PermissionException,
     UserNotActiveException,
 )
-from fastapi_base.models import AuditLog, User
+from fastapi_base.metrics import jwt_decode_failures_total
+from fastapi_base.models import User
+from fastapi_base.revocation import revocation_list
 from fastapi_base.settings import Settings
+from fastapi_base.tokens import (
+    Claims,
+    KeyRing,
+    KeyRingWatcher,
+    TokenIssuer,
+    VerifiedTokenCache,
+)
+from fastapi_base.workers import WorkerPool
 
 pwd_context = PasswordHash.recommended()
 
@@ -26,6 +44,42 @@ oauth2_scheme = OAuth2PasswordBearer(
 
 settings = Settings()
 
+password_hash_pool = WorkerPool(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+)
+
+# Bulk imports hash on their own pool, so they never queue ahead of logins
+bulk_hash_pool = WorkerPool(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.BULK_IMPORT_HASH_WORKERS,
+)
+
+key_ring = KeyRing(
+    algorithm=settings.ALGORITHM,
+    secret=settings.SECRET_KEY,
+    keys_dir=settings.JWT_KEYS_DIR,
+    active_kid=settings.JWT_ACTIVE_KEY_ID,
+)
+
+token_issuer = TokenIssuer(
+    key_ring,
+    lifetime_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    include_iat=settings.JWT_INCLUDE_IAT,
+    include_nbf=settings.JWT_INCLUDE_NBF,
+    include_jti=settings.JWT_INCLUDE_JTI,
+)
+
+token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+
+# Settings are read again on every check, so .env edits are picked up
+key_watcher = KeyRingWatcher(
+    key_ring,
+    active_kid=lambda: Settings().JWT_ACTIVE_KEY_ID,
+    interval=settings.JWT_KEYS_RELOAD_SECONDS,
+    on_reload=token_cache.clear,
+)
+
 
 def get_password_hash(password: str) -> str:
     """
@@ -41,21 +95,85 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def create_access_token(data: dict) -> str:
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the password hash pool, off the event loop.
+    """
+    return await password_hash_pool.run(get_password_hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> bool:
+    """
+    Verify a password on the password hash pool, off the event loop.
+    """
+    return await password_hash_pool.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
+def create_access_token(
+    data: dict, snapshot: Optional[AuthorizationSnapshot] = None
+) -> str:
     """
     Create a JWT access token with the given data.
+
+    Time and id claims are added by ``token_issuer``. In stateless mode
+    the user id and the digest of the authorization ``snapshot`` are
+    embedded, so requests served from a cached snapshot can skip the user
+    lookup.
     """
     to_encode = data.copy()
+    if settings.STATELESS_AUTH and snapshot is not None:
+        to_encode.update({
+            'uid': snapshot.user_id,
+            'pv': snapshot.digest,
+        })
+    return token_issuer.issue(to_encode)
 
-    expire = datetime.now(tz=ZoneInfo('America/Sao_Paulo')) + timedelta(
-        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
 
-    to_encode.update({'exp': expire})
-    encoded_jwt = encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
-    return encoded_jwt
+def reload_signing_keys() -> None:
+    """
+    Re-read the signing keys now, without waiting for ``key_watcher``.
+    Cached claims are dropped, since they may have been verified with a
+    key that was removed.
+    """
+    key_ring.reload()
+    token_cache.clear()
+
+
+def decode_access_token(token: str) -> Claims:
+    """
+    Verify and decode an access token, reusing the claims of tokens that
+    were already verified and have not expired yet.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = token_issuer.verify(token)
+        token_cache.set(token, payload)
+    return payload
+
+
+def get_trusted_principal(payload: Dict[str, Any]) -> Optional[Principal]:
+    """
+    Rebuild the user from the cached authorization snapshot named by
+    stateless token claims, if its digest still matches the token's
+    permissions version.
+
+    This is a fast path for cache hits only: the snapshot is the source of
+    truth, not the claims. On another worker, or once the entry expired,
+    the caller falls back to the user lookup, which caches the snapshot
+    again.
+    """
+    if not settings.STATELESS_AUTH or 'pv' not in payload:
+        return None
+
+    snapshot = authorization_cache.get(payload.get('uid'))
+    if snapshot is None or snapshot.digest != payload['pv']:
+        return None
+
+    return Principal.from_snapshot(snapshot)
 
 
 async def get_current_user(
@@ -66,19 +184,35 @@ async def get_current_user(
     Decode the JWT token and return the user data.
     """
     try:
-        payload = decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_access_token(token)
         subject_email = payload.get('sub')
         if not subject_email:
+            jwt_decode_failures_total.inc('missing_subject')
             raise CredentialsException
-    except DecodeError:
-        raise CredentialsException
     except ExpiredSignatureError:
+        jwt_decode_failures_total.inc('expired')
+        raise CredentialsException
+    except InvalidTokenError:
+        jwt_decode_failures_total.inc('invalid')
         raise CredentialsException
 
+    if revocation_list.is_revoked(payload):
+        jwt_decode_failures_total.inc('revoked')
+        raise CredentialsException
+
+    principal = get_trusted_principal(payload)
+    if principal is not None:
+        return principal
+
+    # Only the user row is read: the permission graph is loaded by
+    # load_authorization_snapshot when the cached snapshot is out of date,
+    # and not at all by the SQL engine. The row is always re-read so its
+    # authorization_version is current.
     user = await session.scalar(
-        select(User).where(User.email == subject_email)
+        select(User)
+        .options(raiseload('*'))
+        .where(User.email == subject_email)
+        .execution_options(populate_existing=True)
     )
 
     if not user:
@@ -102,6 +236,7 @@ async def has_permission(
     action: str,
     resource_id: Optional[int] = None,
     context: Optional[Dict[str, Any]] = None,
+    snapshot: Optional[AuthorizationSnapshot] = None,
 ) -> bool:
     """
     Check if user has permission to perform an action on a resource.
@@ -110,78 +245,30 @@ async def has_permission(
     - Role-based permissions
     - Group-based permissions
     - Contextual conditions
-    """
-    context = context or {}
-
-    # Helper function to check conditions
-    def evaluate_conditions(
-        conditions: Optional[Dict[str, Any]], context: Dict[str, Any]
-    ) -> bool:
-        if not conditions:
-            return True
-
-        # Example condition: {"time_between": ["09:00", "17:00"]}
-        for condition_key, condition_value in conditions.items():
-            if condition_key == 'time_between':
-                current_time = context.get(
-                    'current_time', datetime.now().time()
-                )
-                start_time = datetime.strptime(
-                    condition_value[0], '%H:%M'
-                ).time()
-                end_time = datetime.strptime(
-                    condition_value[1], '%H:%M'
-                ).time()
-                if not (start_time <= current_time <= end_time):
-                    return False
-            elif condition_key == 'ip_range':
-                ip = context.get('ip_address')
-                if not ip or ip not in condition_value:
-                    return False
-            # Add more condition types as needed
-
-        return True
 
+    A precompiled ``snapshot`` may be given to skip walking the ORM graph.
+    """
     if user.is_superuser:
         # Superusers have all permissions
         return True
 
-    # Check direct user permissions
-    for permission in user.direct_permissions:
-        if (
-            permission.resource == resource
-            and permission.action == action
-            and evaluate_conditions(permission.conditions, context)
-        ):
-            return True
-
-    # Check role-based permissions
-    for role in user.roles:
-        for permission in role.permissions:
-            if (
-                permission.resource == resource
-                and permission.action == action
-                and evaluate_conditions(permission.conditions, context)
-            ):
-                return True
-
-    # Check group-based permissions (through roles)
-    for group in user.groups:
-        for role in group.roles:
-            for permission in role.permissions:
-                if (
-                    permission.resource == resource
-                    and permission.action == action
-                    and evaluate_conditions(permission.conditions, context)
-                ):
-                    return True
-
-    return False
+    if snapshot is None:
+        snapshot = compile_permissions(user)
+
+    return snapshot.allows(resource, action, context)
 
 
 def require_permission(resource: str, action: str):
+    """
+    Dependency factory guarding a route with a resource/action permission.
+
+    ``AUTHORIZATION_ENGINE`` selects how the check runs: ``snapshot`` uses
+    the cached compiled permissions, ``sql`` asks the database directly.
+    """
+
     async def permission_dependency(
         current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
         request: Request = None,
     ):
         context = {
@@ -189,33 +276,23 @@ def require_permission(resource: str, action: str):
             'ip_address': request.client.host if request else None,
         }
 
-        if not await has_permission(
-            current_user, resource, action, context=context
-        ):
+        if settings.AUTHORIZATION_ENGINE == 'sql':
+            allowed = await has_permission_sql(
+                session, current_user, resource, action, context
+            )
+        else:
+            allowed = await has_permission(
+                current_user,
+                resource,
+                action,
+                context=context,
+                snapshot=await load_authorization_snapshot(
+                    session, current_user
+                ),
+            )
+
+        if not allowed:
             raise PermissionException(action=action, resource=resource)
         return current_user
 
     return permission_dependency
-
-
-async def create_audit_log(
-    db: AsyncSession,
-    user_id: Optional[int],
-    action: str,
-    resource_type: str,
-    resource_id: Optional[int] = None,
-    details: Optional[Dict[str, Any]] = None,
-    ip_address: Optional[str] = None,
-) -> AuditLog:
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        details=details,
-        ip_address=ip_address,
-    )
-    db.add(audit_log)
-    await db.commit()
-    await db.refresh(audit_log)
-    return audit_log
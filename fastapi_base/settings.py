@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,5 +10,46 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REVOCATION_REFRESH_SECONDS: float = 5.0
+    REVOCATION_REFRESH_OVERLAP_SECONDS: float = 60.0
     SECRET_KEY: str
     ALGORITHM: str
+    JWT_KEYS_DIR: Optional[str] = None
+    JWT_ACTIVE_KEY_ID: Optional[str] = None
+    JWKS_MAX_AGE_SECONDS: int = 300
+    JWT_KEYS_RELOAD_SECONDS: float = 30.0
+    JWT_INCLUDE_IAT: bool = True
+    JWT_INCLUDE_NBF: bool = False
+    JWT_INCLUDE_JTI: bool = True
+
+    DEBUG: bool = False
+
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_TIMEOUT_MS: Optional[int] = None
+    DATABASE_PREPARE_THRESHOLD: Optional[int] = 5
+    QUERY_COUNT_WARNING: int = 20
+
+    AUTHORIZATION_ENGINE: Literal['snapshot', 'sql'] = 'snapshot'
+    AUTHORIZATION_CACHE_TTL_SECONDS: int = 300
+    AUTHORIZATION_CACHE_MAX_SIZE: int = 10_000
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+
+    PASSWORD_HASH_EXECUTOR: str = 'thread'
+    PASSWORD_HASH_WORKERS: int = 4
+
+    BULK_IMPORT_CHUNK_SIZE: int = 1000
+    BULK_IMPORT_HASH_WORKERS: int = 2
+    EXPORT_PARTITION_SIZE: int = 1000
+    FAST_LIST_RESPONSES: bool = False
+
+    STATELESS_AUTH: bool = False
+
+    AUDIT_QUEUE_SIZE: int = 10_000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_DROP_POLICY: str = 'drop_newest'
@@ -0,0 +1,256 @@
+import csv
+import json
+from codecs import getincrementaldecoder
+from datetime import date, datetime, time
+from http import HTTPStatus
+from io import StringIO
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Column, Select, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+CSV_MEDIA_TYPE = 'text/csv'
+
+ExportFormat = Literal['ndjson', 'csv']
+
+# (line number, parsed record, parse error)
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+Rows = List[Dict[str, Any]]
+
+
+def request_media_type(request: Request) -> str:
+    """
+    Return the streaming format of the request body, or 415 when it is
+    neither NDJSON nor CSV.
+    """
+    media_type = request.headers.get('content-type', '').split(';')[0]
+    media_type = media_type.strip().lower()
+    if media_type in {NDJSON_MEDIA_TYPE, 'application/jsonl'}:
+        return NDJSON_MEDIA_TYPE
+    if media_type == CSV_MEDIA_TYPE:
+        return CSV_MEDIA_TYPE
+
+    raise HTTPException(
+        status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+        detail=f'Expected {NDJSON_MEDIA_TYPE} or {CSV_MEDIA_TYPE} body',
+    )
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a byte stream into text lines without buffering the whole body.
+    """
+    decoder = getincrementaldecoder('utf-8')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+
+async def iter_records(request: Request) -> AsyncIterator[Record]:
+    """
+    Parse a streamed NDJSON or CSV body one record at a time.
+
+    CSV bodies must start with a header row and hold one record per line.
+    Blank lines are skipped; lines that cannot be parsed are yielded with
+    an error instead of a record.
+    """
+    media_type = request_media_type(request)
+    header = None
+    line_number = 0
+
+    async for line in iter_lines(request.stream()):
+        line_number += 1
+        if not line.strip():
+            continue
+
+        if media_type == NDJSON_MEDIA_TYPE:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None, 'Invalid JSON'
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, 'Expected a JSON object'
+                continue
+            yield line_number, record, None
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, None, 'Wrong number of columns'
+            continue
+        yield line_number, dict(zip(header, values)), None
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose body is produced while the request body is
+    still being read.
+
+    ``StreamingResponse`` listens for a disconnect on the receive channel,
+    which would swallow request chunks; here a disconnect surfaces through
+    the request stream instead.
+    """
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
+
+
+def ndjson_lines(items: Iterable[Dict[str, Any]]) -> Iterable[str]:
+    """
+    Serialize items as NDJSON, one object per line.
+    """
+    for item in items:
+        yield json.dumps(item) + '\n'
+
+
+async def export_rows(
+    bind: AsyncEngine,
+    stmt: Select,
+    partition_size: int,
+    enrich: Optional[Callable[[AsyncSession, Rows], Awaitable[None]]] = None,
+) -> AsyncIterator[Rows]:
+    """
+    Stream the rows of ``stmt`` from a server-side cursor, one partition
+    at a time. ``enrich`` may add fields to each partition before it is
+    yielded, using the same session.
+
+    The export owns its session because the response body is produced
+    after the request dependencies have been closed.
+    """
+    async with AsyncSession(bind) as session:
+        result = await session.stream(
+            stmt.execution_options(yield_per=partition_size)
+        )
+        async for partition in result.mappings().partitions():
+            rows = [dict(row) for row in partition]
+            if enrich is not None:
+                await enrich(session, rows)
+            yield rows
+
+
+async def attach_associations(
+    session: AsyncSession,
+    rows: Rows,
+    key_column: Column,
+    value_column: Column,
+    field: str,
+) -> None:
+    """
+    Add to each row the ids associated to it through an association table,
+    with one query per partition.
+    """
+    associated: Dict[int, List[int]] = {row['id']: [] for row in rows}
+    result = await session.execute(
+        select(key_column, value_column)
+        .where(key_column.in_(list(associated)))
+        .order_by(key_column, value_column)
+    )
+    for key, value in result:
+        associated[key].append(value)
+    for row in rows:
+        row[field] = associated[row['id']]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+async def _iter_ndjson(partitions: AsyncIterator[Rows]) -> AsyncIterator[str]:
+    async for rows in partitions:
+        yield ''.join(
+            json.dumps(row, default=_json_default) + '\n' for row in rows
+        )
+
+
+async def _iter_csv(
+    partitions: AsyncIterator[Rows], fieldnames: Sequence[str]
+) -> AsyncIterator[str]:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fieldnames)
+    yield buffer.getvalue()
+
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [_csv_value(row[name]) for name in fieldnames] for row in rows
+        )
+        yield buffer.getvalue()
+
+
+def export_response(
+    partitions: AsyncIterator[Rows],
+    fieldnames: Sequence[str],
+    export_format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Stream exported partitions as NDJSON or CSV, one chunk per partition.
+    """
+    if export_format == 'csv':
+        body = _iter_csv(partitions, fieldnames)
+        media_type = CSV_MEDIA_TYPE
+    else:
+        body = _iter_ndjson(partitions)
+        media_type = NDJSON_MEDIA_TYPE
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="{filename}.{export_format}"'
+            )
+        },
+    )
@@ -0,0 +1,382 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from hashlib import sha256
+from logging import getLogger
+from pathlib import Path
+from secrets import token_urlsafe
+from time import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from jwt import DecodeError, decode, encode, get_unverified_header
+from jwt.algorithms import get_default_algorithms
+
+try:
+    from cryptography.hazmat.primitives.serialization import (
+        load_pem_private_key,
+        load_pem_public_key,
+    )
+except ImportError:  # pragma: no cover
+    load_pem_private_key = load_pem_public_key = None
+
+logger = getLogger('uvicorn.error')
+
+Claims = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: Optional[str]
+    # None for retired keys that are kept only to verify tokens
+    private_key: Any
+    public_key: Any
+
+    @property
+    def headers(self) -> Optional[Dict[str, str]]:
+        return {'kid': self.kid} if self.kid else None
+
+
+class KeyRing:
+    """
+    Keys used to sign and verify access tokens.
+
+    HMAC algorithms (``HS*``) use the shared secret. Asymmetric algorithms
+    (RS256, ES256, EdDSA...) read one PEM file per key from ``keys_dir``,
+    named ``<kid>.pem``: tokens are signed with the active private key and
+    tagged with its ``kid``, and verified with whichever key their ``kid``
+    names. The active key is ``active_kid``, which may only be left unset
+    while the directory holds a single private key, so adding a key never
+    changes which one signs.
+
+    Gateways cache the JWKS, so a new key must be published before it
+    signs anything. To rotate, with ``JWT_ACTIVE_KEY_ID`` naming the
+    current key:
+
+    1. add ``<new kid>.pem``; once reloaded it is served in the JWKS, but
+       tokens are still signed with the current key;
+    2. wait ``JWKS_MAX_AGE_SECONDS`` so every gateway has fetched it;
+    3. set ``JWT_ACTIVE_KEY_ID`` to the new kid and reload;
+    4. keep the old key, private or public only, until the tokens it
+       signed have expired, then delete it and reload.
+
+    ``KeyRingWatcher`` reloads the ring when the files or the active kid
+    change.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret: Optional[str] = None,
+        keys_dir: Optional[str] = None,
+        active_kid: Optional[str] = None,
+    ):
+        self.algorithm = algorithm
+        self.secret = secret
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self.reload()
+
+    @property
+    def symmetric(self) -> bool:
+        return self.algorithm.startswith('HS')
+
+    def _fingerprint(self) -> Tuple[Tuple[str, int, int], ...]:
+        return tuple(
+            (path.name, stat.st_mtime_ns, stat.st_size)
+            for path in sorted(Path(self.keys_dir).glob('*.pem'))
+            for stat in (path.stat(),)
+        )
+
+    def changed(self, active_kid: Optional[str]) -> bool:
+        """
+        Whether the key files or the active kid differ from the last load.
+        """
+        if self.symmetric:
+            return False
+        return (active_kid, self._fingerprint()) != self._loaded
+
+    def reload(self) -> None:
+        if self.symmetric:
+            self._keys = {None: SigningKey(None, self.secret, self.secret)}
+            self._signing_key = self._keys[None]
+            self._jwks = {'keys': []}
+            self._loaded = None
+            return
+
+        if load_pem_private_key is None:  # pragma: no cover
+            raise RuntimeError(
+                f'{self.algorithm} requires the cryptography package'
+            )
+        if not self.keys_dir:
+            raise RuntimeError(f'{self.algorithm} requires JWT_KEYS_DIR')
+
+        # Taken before reading, so a file written meanwhile is seen next time
+        fingerprint = self._fingerprint()
+        keys = {}
+        for path in sorted(Path(self.keys_dir).glob('*.pem')):
+            keys[path.stem] = _load_pem_key(path.stem, path.read_bytes())
+        signing = [kid for kid, key in keys.items() if key.private_key]
+        active_kid = self.active_kid
+        if active_kid is None:
+            if len(signing) != 1:
+                raise RuntimeError(
+                    'JWT_ACTIVE_KEY_ID is required with several private keys'
+                )
+            active_kid = signing[0]
+        if active_kid not in signing:
+            raise RuntimeError(f'No private key for key id {active_kid}')
+
+        self._keys = keys
+        self._signing_key = keys[active_kid]
+        self._jwks = {'keys': [self._jwk(key) for key in keys.values()]}
+        self._loaded = (self.active_kid, fingerprint)
+
+    def _jwk(self, key: SigningKey) -> Dict[str, Any]:
+        algorithm = get_default_algorithms()[self.algorithm]
+        jwk = algorithm.to_jwk(key.public_key, as_dict=True)
+        jwk.update(kid=key.kid, use='sig', alg=self.algorithm)
+        return jwk
+
+    @property
+    def signing_key(self) -> SigningKey:
+        return self._signing_key
+
+    def verification_key(self, kid: Optional[str]) -> Any:
+        if self.symmetric:
+            return self.secret
+        key = self._keys.get(kid)
+        if key is None:
+            raise DecodeError('Unknown key id')
+        return key.public_key
+
+    def jwks(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Public keys as a JSON Web Key Set, built once per (re)load.
+        """
+        return self._jwks
+
+
+class KeyRingWatcher:
+    """
+    Background task that reloads a ``KeyRing`` every ``interval`` seconds
+    when its key files or its active kid, read from ``active_kid()``, have
+    changed, so a rotation reaches every worker without a restart.
+
+    A failed reload, e.g. an active kid without a private key, leaves the
+    keys already loaded in use and is retried on the next check.
+    """
+
+    def __init__(
+        self,
+        key_ring: KeyRing,
+        active_kid: Callable[[], Optional[str]],
+        interval: float = 30.0,
+        on_reload: Optional[Callable[[], None]] = None,
+    ):
+        self.key_ring = key_ring
+        self.active_kid = active_kid
+        self.interval = interval
+        self.on_reload = on_reload
+        self.reloads = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def check(self) -> bool:
+        """
+        Reload the ring if it changed; return whether it was reloaded.
+        """
+        active_kid = self.active_kid()
+        if not self.key_ring.changed(active_kid):
+            return False
+
+        previous = self.key_ring.active_kid
+        self.key_ring.active_kid = active_kid
+        try:
+            self.key_ring.reload()
+        except Exception:
+            self.key_ring.active_kid = previous
+            raise
+        if self.on_reload is not None:
+            self.on_reload()
+        self.reloads += 1
+        logger.info('Signing keys reloaded, active key %s.', active_kid)
+        return True
+
+    async def start(self) -> None:
+        if not self.running and not self.key_ring.symmetric:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.check()
+            except Exception:
+                self.failed += 1
+                logger.exception('Failed to reload signing keys.')
+
+    def stats(self) -> Dict[str, Any]:
+        return {'reloads': self.reloads, 'failed': self.failed}
+
+
+def _load_pem_key(kid: str, data: bytes) -> SigningKey:
+    try:
+        private_key = load_pem_private_key(data, password=None)
+    except ValueError:
+        return SigningKey(kid, None, load_pem_public_key(data))
+    return SigningKey(kid, private_key, private_key.public_key())
+
+
+class TokenIssuer:
+    """
+    Signs and verifies access tokens with the keys of a ``KeyRing``.
+
+    Time claims (``exp``, ``iat``, ``nbf``) are whole seconds since the
+    epoch, so minting a token only reads the clock once and involves no
+    timezone. ``iat`` and ``jti`` are needed to revoke tokens and are on
+    by default; ``nbf`` is off.
+    """
+
+    def __init__(
+        self,
+        key_ring: KeyRing,
+        lifetime_seconds: int,
+        include_iat: bool = True,
+        include_nbf: bool = False,
+        include_jti: bool = True,
+    ):
+        self.key_ring = key_ring
+        self.lifetime_seconds = lifetime_seconds
+        self.include_iat = include_iat
+        self.include_nbf = include_nbf
+        self.include_jti = include_jti
+
+    def issue(self, claims: Claims) -> str:
+        now = int(time())
+        payload = {**claims, 'exp': now + self.lifetime_seconds}
+        if self.include_iat:
+            payload['iat'] = now
+        if self.include_nbf:
+            payload['nbf'] = now
+        if self.include_jti:
+            payload['jti'] = token_urlsafe(16)
+
+        key = self.key_ring.signing_key
+        return encode(
+            payload,
+            key.private_key,
+            algorithm=self.key_ring.algorithm,
+            headers=key.headers,
+        )
+
+    def verify(self, token: str) -> Claims:
+        kid = get_unverified_header(token).get('kid')
+        return decode(
+            token,
+            self.key_ring.verification_key(kid),
+            algorithms=[self.key_ring.algorithm],
+        )
+
+
+class VerifiedTokenCache:
+    """
+    Process-wide LRU cache of the claims of access tokens whose signature
+    was already verified, keyed by a SHA-256 digest of the token.
+
+    Entries are dropped once the token's ``exp`` has passed, so an expired
+    token is decoded again and rejected. Only the signature check is
+    skipped: the user lookup and every other check still run per request.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, Claims] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Claims]:
+        key = self._key(token)
+        claims = self._entries.get(key)
+        if claims is None or claims['exp'] <= time():
+            if claims is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def set(self, token: str, claims: Claims) -> None:
+        # Tokens without a numeric expiry would never leave the cache
+        if self.max_size <= 0 or not isinstance(
+            claims.get('exp'), (int, float)
+        ):
+            return
+
+        key = self._key(token)
+        self._entries[key] = claims
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+def utcnow() -> datetime:
+    """
+    Current UTC time as a naive datetime, like the TIMESTAMP columns.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_epoch(value: datetime) -> int:
+    """
+    Seconds since the epoch of a naive UTC datetime, as in JWT claims.
+    """
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+def from_epoch(value: float) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+def refresh_token_digest(token: str) -> str:
+    return sha256(token.encode()).hexdigest()
+
+
+def new_refresh_token() -> Tuple[str, str]:
+    """
+    Return a new opaque refresh token and the digest stored for it.
+    """
+    token = token_urlsafe(32)
+    return token, refresh_token_digest(token)
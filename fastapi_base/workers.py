@@ -0,0 +1,84 @@
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import partial
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class WorkerPool:
+    """
+    Bounded pool that runs CPU-bound calls off the event loop.
+
+    At most ``max_workers`` calls run at the same time; the others wait on a
+    semaphore, and the number of waiting calls is reported as the queue
+    depth.
+    """
+
+    def __init__(self, kind: str = 'thread', max_workers: int = 4):
+        if kind not in {'thread', 'process'}:
+            raise ValueError(f'Unknown worker pool kind: {kind}')
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix='worker-pool'
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores bind to the loop they first wait on, so keep one per loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        semaphore = self._get_semaphore()
+
+        self.queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), partial(func, *args)
+            )
+        finally:
+            self.running -= 1
+            self.completed += 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'queued': self.queued,
+            'running': self.running,
+            'completed': self.completed,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
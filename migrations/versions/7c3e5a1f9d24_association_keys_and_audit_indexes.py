@@ -0,0 +1,85 @@
+"""association keys and audit indexes
+
+Revision ID: 7c3e5a1f9d24
+Revises: 490662d2bc7a
+Create Date: 2026-10-17 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e5a1f9d24'
+down_revision: Union[str, Sequence[str], None] = '490662d2bc7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (primary key columns, reverse lookup column)
+ASSOCIATION_TABLES = {
+    'user_roles': (['user_id', 'role_id'], 'role_id'),
+    'role_permissions': (['role_id', 'permission_id'], 'permission_id'),
+    'user_permissions': (['user_id', 'permission_id'], 'permission_id'),
+    'user_groups': (['user_id', 'group_id'], 'group_id'),
+    'group_roles': (['group_id', 'role_id'], 'role_id'),
+}
+
+
+def _remove_invalid_rows(table: str, columns: list) -> None:
+    """Drop NULL and duplicated pairs so the primary key can be created."""
+    first, second = columns
+    row_id = 'ctid' if op.get_bind().dialect.name == 'postgresql' else 'rowid'
+
+    op.execute(
+        f'DELETE FROM {table} WHERE {first} IS NULL OR {second} IS NULL'
+    )
+    op.execute(
+        f'DELETE FROM {table} WHERE {row_id} NOT IN ('
+        f'SELECT MIN({row_id}) FROM {table} GROUP BY {first}, {second})'
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, (columns, reverse_column) in ASSOCIATION_TABLES.items():
+        _remove_invalid_rows(table, columns)
+
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    column, existing_type=sa.Integer(), nullable=False
+                )
+            batch_op.create_primary_key(f'pk_{table}', columns)
+            batch_op.create_index(
+                f'ix_{table}_{reverse_column}', [reverse_column]
+            )
+
+    op.create_index(
+        'ix_audit_logs_user_id_timestamp',
+        'audit_logs',
+        ['user_id', 'timestamp'],
+    )
+    op.create_index(
+        'ix_audit_logs_resource_type_resource_id',
+        'audit_logs',
+        ['resource_type', 'resource_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_audit_logs_resource_type_resource_id', table_name='audit_logs'
+    )
+    op.drop_index('ix_audit_logs_user_id_timestamp', table_name='audit_logs')
+
+    for table, (columns, reverse_column) in ASSOCIATION_TABLES.items():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(f'ix_{table}_{reverse_column}')
+            batch_op.drop_constraint(f'pk_{table}', type_='primary')
+            for column in columns:
+                batch_op.alter_column(
+                    column, existing_type=sa.Integer(), nullable=True
+                )
@@ -0,0 +1,34 @@
+"""row versions
+
+Revision ID: c6f1d9a4e872
+Revises: e4a9c7b3d215
+Create Date: 2026-10-17 21:14:09.517302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f1d9a4e872'
+down_revision: Union[str, Sequence[str], None] = 'e4a9c7b3d215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('groups', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('permissions', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('roles', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('users', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'version')
+    op.drop_column('roles', 'version')
+    op.drop_column('permissions', 'version')
+    op.drop_column('groups', 'version')
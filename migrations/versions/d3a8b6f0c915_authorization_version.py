@@ -0,0 +1,28 @@
+"""authorization version
+
+Revision ID: d3a8b6f0c915
+Revises: c6f1d9a4e872
+Create Date: 2026-10-17 23:41:26.208734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8b6f0c915'
+down_revision: Union[str, Sequence[str], None] = 'c6f1d9a4e872'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('authorization_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'authorization_version')
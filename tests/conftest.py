@@ -11,7 +11,12 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
 from fastapi_base.app import app
-from fastapi_base.database import get_session
+from fastapi_base.authorization import authorization_cache
+from fastapi_base.database import (
+    get_session,
+    instrument_engine,
+    track_queries,
+)
 from fastapi_base.models import (
     Group,
     Permission,
@@ -19,7 +24,8 @@ from fastapi_base.models import (
     User,
     table_registry,
 )
-from fastapi_base.security import get_password_hash
+from fastapi_base.revocation import revocation_list
+from fastapi_base.security import get_password_hash, token_cache
 from fastapi_base.settings import Settings
 from tests.seed import seed_data_with_session
 
@@ -338,7 +344,7 @@ class UserFactory(factory.Factory):
 def engine():
     with PostgresContainer('postgres:16', driver='psycopg') as postgres:
         _engine = create_async_engine(postgres.get_connection_url())
-        yield _engine
+        yield instrument_engine(_engine)
 
 
 @pytest.fixture
@@ -587,6 +593,12 @@ async def session(engine):
     async with engine.begin() as conn:
         await conn.run_sync(table_registry.metadata.create_all)
 
+    # Ids restart with every fresh database, so cached snapshots must not
+    # leak from one test into the next.
+    authorization_cache.clear()
+    token_cache.clear()
+    revocation_list.clear()
+
     async with AsyncSession(engine, expire_on_commit=False) as session:
         await seed_data_with_session(session)
         yield session
@@ -618,6 +630,24 @@ def _mock_db_time(*, model, time=datetime(2024, 1, 1)):
     event.remove(model, 'before_insert', fake_time_hook)
 
 
+@pytest.fixture
+def query_budget():
+    """
+    Fixture to assert that a block runs at most a given number of SQL
+    statements, e.g. `with query_budget(5): await client.get(...)`.
+    """
+    return _query_budget
+
+
+@contextmanager
+def _query_budget(max_queries: int):
+    with track_queries() as stats:
+        yield stats
+    assert stats.count <= max_queries, (
+        f'{stats.count} queries executed, budget is {max_queries}'
+    )
+
+
 async def populate_database(session: AsyncSession):
     """
     Função reutilizável para popular o banco de dados com dados iniciais.
@@ -669,7 +699,7 @@ async def populate_database(session: AsyncSession):
         if group:
             for role_name in group_role_data['roles']:
                 role = roles_map.get(role_name)
-                if role and role not in group.roles:
+                if role and role.id not in {r.id for r in group.roles}:
                     group.roles.append(role)
 
     # --- Associar Roles e Permissões ---
@@ -678,7 +708,9 @@ async def populate_database(session: AsyncSession):
         if role:
             for perm_name in role_perm_data['permissions']:
                 permission = permissions_map.get(perm_name)
-                if permission and permission not in role.permissions:
+                if permission and permission.id not in {
+                    p.id for p in role.permissions
+                }:
                     role.permissions.append(permission)
 
     # Salva todas as alterações de uma vez no final
@@ -301,7 +301,7 @@ async def seed_data_with_session(session: AsyncSession):
         if group:
             for role_name in group_role_data["roles"]:
                 role = roles_map.get(role_name)
-                if role and role not in group.roles:
+                if role and role.id not in {r.id for r in group.roles}:
                     group.roles.append(role)
 
     for role_perm_data in ROLES_PERMISSIONS_TO_CREATE:
@@ -309,7 +309,7 @@ async def seed_data_with_session(session: AsyncSession):
         if role:
             for perm_name in role_perm_data["permissions"]:
                 permission = permissions_map.get(perm_name)
-                if permission and permission not in role.permissions:
+                if permission and permission.id not in {p.id for p in role.permissions}:
                     role.permissions.append(permission)
 
     await session.commit()
\ No newline at end of file
@@ -1,6 +1,20 @@
 from http import HTTPStatus
 
 import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from fastapi_base import middleware
+from fastapi_base.database import (
+    InstrumentedQueuePool,
+    pool_status,
+    track_queries,
+)
+from fastapi_base.metrics import (
+    Counter,
+    Histogram,
+    http_requests_total,
+    jwt_decode_failures_total,
+)
 
 
 @pytest.mark.asyncio
@@ -9,3 +23,123 @@ async def test_root_deve_retornar_ok(client):
 
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {'message': 'Up!'}
+
+
+@pytest.mark.asyncio
+async def test_status_database_deve_retornar_estado_do_pool(client):
+    response = await client.get('/status/database')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'pool' in response.json()
+
+
+@pytest.mark.asyncio
+async def test_pool_instrumentado_registra_checkouts():
+    engine = create_async_engine(
+        'sqlite+aiosqlite:///:memory:',
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+
+    async with engine.connect():
+        status = pool_status(engine)
+        assert status['checked_out'] == 1
+        assert status['checkouts'] == 1
+
+    status = pool_status(engine)
+    assert status['pool'] == 'InstrumentedQueuePool'
+    assert status['checked_out'] == 0
+    assert status['checked_in'] == 1
+    assert status['timeouts'] == 0
+    assert status['max_checkout_seconds'] > 0
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_query_stats_devem_ir_nos_headers_em_modo_debug(
+    client, admin_token, monkeypatch
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    response = await client.get('/users/', headers=headers)
+    assert 'X-DB-Query-Count' not in response.headers
+
+    monkeypatch.setattr(middleware.settings, 'DEBUG', True)
+    response = await client.get('/users/', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert int(response.headers['X-DB-Query-Count']) > 0
+    assert float(response.headers['X-DB-Time-Ms']) >= 0
+    assert float(response.headers['X-DB-Slowest-Ms']) >= 0
+
+
+@pytest.mark.asyncio
+async def test_requisicao_com_muitas_queries_deve_gerar_warning(
+    client, admin_token, monkeypatch, caplog
+):
+    monkeypatch.setattr(middleware.settings, 'QUERY_COUNT_WARNING', 0)
+
+    with track_queries() as stats:
+        await client.get(
+            '/users/', headers={'Authorization': f'Bearer {admin_token}'}
+        )
+
+    record = next(r for r in caplog.records if r.path == '/users/')
+    assert record.levelname == 'WARNING'
+    assert record.db_query_count == stats.count
+    assert record.db_slowest_statement.startswith('SELECT')
+
+
+def test_histogram_deve_acumular_buckets():
+    histogram = Histogram('latency', 'Latency', ('route',), buckets=(0.1, 1))
+    histogram.observe(0.05, '/a')
+    histogram.observe(0.1, '/a')
+    histogram.observe(5, '/a')
+
+    assert histogram.render() == [
+        '# HELP latency Latency',
+        '# TYPE latency histogram',
+        'latency_bucket{route="/a",le="0.1"} 2',
+        'latency_bucket{route="/a",le="1"} 2',
+        'latency_bucket{route="/a",le="+Inf"} 3',
+        'latency_sum{route="/a"} 5.15',
+        'latency_count{route="/a"} 3',
+    ]
+
+
+def test_counter_deve_escapar_labels():
+    counter = Counter('errors_total', 'Errors', ('reason',))
+    counter.inc('say "hi"')
+    counter.inc('say "hi"', amount=2)
+
+    assert counter.render()[-1] == 'errors_total{reason="say \\"hi\\""} 3'
+
+
+@pytest.mark.asyncio
+async def test_metrics_deve_expor_rotas_e_falhas_de_jwt(client, user):
+    invalid_before = jwt_decode_failures_total.value('invalid')
+    requests_before = http_requests_total.value(
+        'GET', '/users/{user_id}', '401'
+    )
+
+    await client.get(
+        f'/users/{user.id}', headers={'Authorization': 'Bearer invalid'}
+    )
+    response = await client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert jwt_decode_failures_total.value('invalid') == invalid_before + 1
+    assert (
+        http_requests_total.value('GET', '/users/{user_id}', '401')
+        == requests_before + 1
+    )
+    body = response.text
+    assert 'http_request_duration_seconds_bucket{method="GET",' in body
+    assert 'http_requests_in_flight{method="GET"} 1' in body
+    assert 'db_queries_count_total' in body
+    assert 'authorization_cache_hits_total' in body
+    assert 'password_hash_pool_queued' in body
+    assert 'audit_queued' in body
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+from freezegun import freeze_time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_base.audit import AuditLogWriter
+from fastapi_base.models import AuditLog
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_grava_eventos_em_lotes(engine, session, user):
+    total_events = 5
+    writer = AuditLogWriter(
+        session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+        batch_size=2,
+        flush_interval=0.01,
+    )
+
+    await writer.start()
+    for resource_id in range(total_events):
+        await writer.submit(
+            user_id=user.id,
+            action='update',
+            resource_type='users',
+            resource_id=resource_id,
+        )
+    await writer.stop()
+
+    logs = (await session.scalars(select(AuditLog))).all()
+
+    assert sorted(log.resource_id for log in logs) == list(range(total_events))
+    assert writer.stats() == {
+        'queued': 0,
+        'written': total_events,
+        'dropped': 0,
+        'failed': 0,
+        'batches': 3,
+    }
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_registra_horario_do_evento_e_nao_do_lote(
+    engine, session, user
+):
+    writer = AuditLogWriter(
+        session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+        flush_interval=60,
+    )
+
+    with freeze_time('2026-01-01 12:00:00'):
+        await writer.submit(
+            user_id=user.id, action='login', resource_type='auth'
+        )
+    with freeze_time('2026-01-01 12:00:05'):
+        await writer.submit(
+            user_id=user.id, action='logout', resource_type='auth'
+        )
+    await writer.stop()
+
+    logs = (
+        await session.scalars(select(AuditLog).order_by(AuditLog.timestamp))
+    ).all()
+
+    assert [(log.action, log.timestamp) for log in logs] == [
+        ('login', datetime(2026, 1, 1, 12, 0, 0)),
+        ('logout', datetime(2026, 1, 1, 12, 0, 5)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_descarta_evento_novo_com_fila_cheia():
+    writer = AuditLogWriter(session_factory=None, max_queue_size=1)
+
+    assert await writer.submit(None, 'login', 'auth') is True
+    assert await writer.submit(None, 'logout', 'auth') is False
+    assert writer.stats()['dropped'] == 1
+    assert writer._queue.get_nowait()['action'] == 'login'
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_descarta_evento_antigo_com_fila_cheia():
+    writer = AuditLogWriter(
+        session_factory=None, max_queue_size=1, drop_policy='drop_oldest'
+    )
+
+    assert await writer.submit(None, 'login', 'auth') is True
+    assert await writer.submit(None, 'logout', 'auth') is True
+    assert writer.stats()['dropped'] == 1
+    assert writer._queue.get_nowait()['action'] == 'logout'
+
+
+def test_audit_writer_politica_invalida():
+    with pytest.raises(ValueError, match='Unknown audit drop policy'):
+        AuditLogWriter(session_factory=None, drop_policy='ignore')
@@ -2,8 +2,15 @@ from http import HTTPStatus
 
 import pytest
 from freezegun import freeze_time
+from jwt import decode
+from sqlalchemy import insert
 
+from fastapi_base import security
+from fastapi_base.authorization import Principal, authorization_cache
+from fastapi_base.models import TokenRevocation
+from fastapi_base.revocation import TokenRevocationList
 from fastapi_base.security import create_access_token
+from fastapi_base.tokens import from_epoch, to_epoch, utcnow
 
 
 @pytest.mark.asyncio
@@ -125,3 +132,275 @@ async def test_token_expirado_deve_retornar_403_ao_renovar(client, user):
         )
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+@pytest.mark.asyncio
+async def test_modo_stateless_confia_nas_claims_ate_a_versao_mudar(
+    client, admin_user, monkeypatch, settings
+):
+    monkeypatch.setattr(security.settings, 'STATELESS_AUTH', True)
+
+    response = await client.post(
+        '/auth/token',
+        data={
+            'username': admin_user.email,
+            'password': admin_user.clean_password,
+        },
+    )
+    token = response.json()['access_token']
+    payload = decode(
+        token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    )
+
+    assert payload['uid'] == admin_user.id
+    assert 'pv' in payload
+
+    principal = security.get_trusted_principal(payload)
+    assert isinstance(principal, Principal)
+    assert principal.id == admin_user.id
+    assert principal.email == admin_user.email
+
+    response = await client.get(
+        f'/users/{admin_user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    authorization_cache.invalidate([admin_user.id])
+    assert security.get_trusted_principal(payload) is None
+
+    # A cache miss, as on another worker, falls back to the user lookup
+    response = await client.get(
+        f'/users/{admin_user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert security.get_trusted_principal(payload) is not None
+
+
+async def _login(client, user, **headers):
+    response = await client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+        headers=headers,
+    )
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_refresh_deve_trocar_refresh_token_a_cada_uso(
+    client, user, query_budget
+):
+    tokens = await _login(client, user)
+
+    with query_budget(2):
+        response = await client.post(
+            '/auth/refresh', json={'refresh_token': tokens['refresh_token']}
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    new_tokens = response.json()
+    assert new_tokens['refresh_token'] != tokens['refresh_token']
+    response = await client.post(
+        '/auth/refresh_token',
+        headers={'Authorization': f'Bearer {new_tokens["access_token"]}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.post(
+        '/auth/refresh', json={'refresh_token': tokens['refresh_token']}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {'detail': 'Invalid refresh token'}
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_expirado_deve_ser_recusado(client, user):
+    with freeze_time('2025-07-01 12:00:00'):
+        tokens = await _login(client, user)
+
+    with freeze_time('2025-08-01 12:00:00'):
+        response = await client.post(
+            '/auth/refresh', json={'refresh_token': tokens['refresh_token']}
+        )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_sessao_revogada_nao_deve_renovar_token(client, user):
+    phone = await _login(client, user, **{'User-Agent': 'phone'})
+    laptop = await _login(client, user, **{'User-Agent': 'laptop'})
+    headers = {'Authorization': f'Bearer {laptop["access_token"]}'}
+
+    response = await client.get('/auth/sessions', headers=headers)
+    sessions = response.json()['sessions']
+    assert [s['device'] for s in sessions] == ['phone', 'laptop']
+
+    response = await client.delete(
+        f'/auth/sessions/{sessions[0]["id"]}', headers=headers
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.post(
+        '/auth/refresh', json={'refresh_token': phone['refresh_token']}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = await client.post(
+        '/auth/refresh', json={'refresh_token': laptop['refresh_token']}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.delete(
+        f'/auth/sessions/{sessions[0]["id"]}', headers=headers
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_logout_deve_revogar_apenas_o_token_usado(client, user):
+    first = await _login(client, user)
+    second = await _login(client, user)
+
+    response = await client.post(
+        '/auth/logout',
+        headers={'Authorization': f'Bearer {first["access_token"]}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.post(
+        '/auth/refresh_token',
+        headers={'Authorization': f'Bearer {first["access_token"]}'},
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = await client.post(
+        '/auth/refresh_token',
+        headers={'Authorization': f'Bearer {second["access_token"]}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_logout_deve_encerrar_a_sessao_do_dispositivo(client, user):
+    first = await _login(client, user)
+    second = await _login(client, user)
+    assert first['session_id'] != second['session_id']
+
+    # A token renewed with the access token still belongs to the session
+    response = await client.post(
+        '/auth/refresh_token',
+        headers={'Authorization': f'Bearer {first["access_token"]}'},
+    )
+    response = await client.post(
+        '/auth/logout',
+        headers={'Authorization': f'Bearer {response.json()["access_token"]}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.post(
+        '/auth/refresh', json={'refresh_token': first['refresh_token']}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = await client.post(
+        '/auth/refresh', json={'refresh_token': second['refresh_token']}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['session_id'] == second['session_id']
+
+
+@pytest.mark.asyncio
+async def test_revogar_tokens_do_usuario_invalida_tokens_anteriores(
+    client, user, admin_user
+):
+    with freeze_time('2025-07-01 12:00:00') as frozen_time:
+        admin_tokens = await _login(client, admin_user)
+        tokens = await _login(client, user)
+        response = await client.post(
+            f'/users/{user.id}/tokens/revoke',
+            headers={
+                'Authorization': f'Bearer {admin_tokens["access_token"]}'
+            },
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        frozen_time.tick(1)
+        response = await client.post(
+            '/auth/refresh_token',
+            headers={'Authorization': f'Bearer {tokens["access_token"]}'},
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        response = await client.post(
+            '/auth/refresh', json={'refresh_token': tokens['refresh_token']}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+        new_tokens = await _login(client, user)
+        response = await client.post(
+            '/auth/refresh_token',
+            headers={'Authorization': f'Bearer {new_tokens["access_token"]}'},
+        )
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_lista_de_revogacao_le_apenas_entradas_novas(session):
+    revocations = TokenRevocationList(session_factory=None)
+    now = to_epoch(utcnow())
+    session.add_all([
+        TokenRevocation(expires_at=from_epoch(now + 60), jti='ativo'),
+        TokenRevocation(expires_at=from_epoch(now - 60), jti='expirado'),
+    ])
+    await session.commit()
+
+    assert not revocations.is_revoked({'jti': 'ativo'})
+    await revocations.refresh(session)
+
+    assert revocations.is_revoked({'jti': 'ativo'})
+    assert not revocations.is_revoked({'jti': 'expirado'})
+
+    session.add(
+        TokenRevocation(
+            expires_at=from_epoch(now + 60),
+            subject='alice@example.com',
+            not_before=from_epoch(now),
+        )
+    )
+    await session.commit()
+    await revocations.refresh(session)
+
+    assert revocations.is_revoked({'sub': 'alice@example.com', 'iat': now})
+    assert not revocations.is_revoked({
+        'sub': 'alice@example.com',
+        'iat': now + 1,
+    })
+    assert revocations.stats()['jtis'] == 1
+
+
+@pytest.mark.asyncio
+async def test_lista_de_revogacao_aplica_entradas_confirmadas_fora_de_ordem(
+    session,
+):
+    revocations = TokenRevocationList(session_factory=None, overlap=30)
+    expires_at = from_epoch(to_epoch(utcnow()) + 3600)
+
+    with freeze_time() as frozen_time:
+        await session.execute(
+            insert(TokenRevocation).values(
+                id=2, expires_at=expires_at, jti='segundo'
+            )
+        )
+        await session.commit()
+        await revocations.refresh(session)
+
+        # Id 1 was assigned first but its transaction committed later
+        frozen_time.tick(10)
+        await session.execute(
+            insert(TokenRevocation).values(
+                id=1, expires_at=expires_at, jti='primeiro'
+            )
+        )
+        await session.commit()
+        await revocations.refresh(session)
+
+        assert revocations.is_revoked({'jti': 'segundo'})
+        assert revocations.is_revoked({'jti': 'primeiro'})
@@ -0,0 +1,54 @@
+import pytest
+
+from benchmarks.compare import compare
+from benchmarks.dataset import Scale
+from benchmarks.run import SCENARIOS, percentile, run_benchmarks
+from benchmarks.tokens import run_token_benchmarks
+
+
+def test_percentile_usa_posicao_mais_proxima():
+    values = [float(n) for n in range(1, 101)]
+
+    assert percentile(values, 50) == values[49]
+    assert percentile(values, 99) == values[98]
+    assert percentile([], 95) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_run_benchmarks_gera_relatorio_para_cada_cenario(tmp_path):
+    report = await run_benchmarks(
+        f'sqlite+aiosqlite:///{tmp_path / "bench.db"}',
+        Scale(users=10, groups=2, roles=2, permissions=5, audit_logs=10),
+        requests=2,
+        concurrency=1,
+        warmup=0,
+    )
+
+    assert report['meta']['database'] == 'sqlite'
+    assert [r['name'] for r in report['results']] == list(SCENARIOS)
+    for result in report['results']:
+        assert result['errors'] == 0
+        assert result['queries_per_request'] > 0
+        assert {'p50', 'p95', 'p99'} <= set(result['latency_ms'])
+
+    results = {r['name']: r for r in report['results']}
+    slower = {
+        name: {**r, 'latency_ms': {'p95': r['latency_ms']['p95'] * 2}}
+        for name, r in results.items()
+    }
+    _, regressions = compare(results, slower, threshold=10)
+    assert len(regressions) == len(SCENARIOS)
+
+
+def test_run_token_benchmarks_mede_assinatura_e_verificacao():
+    iterations = 3
+    report = run_token_benchmarks(iterations, algorithms=['HS256'])
+
+    assert [r['name'] for r in report['results']] == [
+        'HS256_sign',
+        'HS256_verify',
+        'HS256_verify_cached',
+    ]
+    for result in report['results']:
+        assert result['requests'] == iterations
+        assert result['throughput_rps'] > 0
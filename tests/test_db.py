@@ -1,10 +1,19 @@
 from dataclasses import asdict
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from fastapi_base.models import User
+from fastapi_base.database import create_engine_from_settings
+from fastapi_base.models import (
+    AuditLog,
+    Role,
+    User,
+    table_registry,
+    user_roles,
+)
 
 
 @pytest.mark.asyncio
@@ -16,7 +25,11 @@ async def test_create_user(session: AsyncSession, mock_db_time):
         session.add(new_user)
         await session.commit()
 
-    user = await session.scalar(select(User).where(User.username == 'alice'))
+    user = await session.scalar(
+        select(User)
+        .options(selectinload(User.audit_logs))
+        .where(User.username == 'alice')
+    )
 
     assert asdict(user) == {
         'id': 1,
@@ -25,16 +38,95 @@ async def test_create_user(session: AsyncSession, mock_db_time):
         'password': 'secret',
         'created_at': time,
         'updated_at': time,
+        'version': 1,
         'audit_logs': [],
         'direct_permissions': [],
         'groups': [],
         'roles': [],
         'is_active': True,
         'is_superuser': False,
+        'authorization_version': 1,
     }
 
 
+@pytest.mark.asyncio
+async def test_audit_logs_sem_loader_explicito_geram_erro(
+    session: AsyncSession, user: User
+):
+    session.add(
+        AuditLog(
+            user_id=user.id,
+            action='login',
+            resource_type='auth',
+            resource_id=None,
+            details=None,
+            ip_address=None,
+        )
+    )
+    await session.commit()
+
+    db_user = await session.scalar(
+        select(User)
+        .where(User.id == user.id)
+        .execution_options(populate_existing=True)
+    )
+    with pytest.raises(InvalidRequestError):
+        _ = db_user.audit_logs
+
+    db_user = await session.scalar(
+        select(User)
+        .options(selectinload(User.audit_logs))
+        .where(User.id == user.id)
+        .execution_options(populate_existing=True)
+    )
+    assert [log.action for log in db_user.audit_logs] == ['login']
+
+
+@pytest.mark.asyncio
+async def test_associacao_duplicada_e_rejeitada_pelo_banco(
+    session: AsyncSession, user: User, role
+):
+    stmt = insert(user_roles).values(user_id=user.id, role_id=role.id)
+    await session.execute(stmt)
+    await session.commit()
+
+    with pytest.raises(IntegrityError):
+        await session.execute(stmt)
+    await session.rollback()
+
+
 # @pytest.mark.asyncio
+@pytest.mark.asyncio
+async def test_sqlite_remove_associacoes_em_cascata(settings):
+    engine = create_engine_from_settings(
+        settings.model_copy(
+            update={'DATABASE_URL': 'sqlite+aiosqlite:///:memory:'}
+        )
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+            await conn.execute(
+                insert(User.__table__).values(
+                    id=1, username='alice', email='alice@test', password='x'
+                )
+            )
+            role_id = await conn.scalar(
+                insert(Role.__table__).values(name='r').returning(Role.id)
+            )
+            await conn.execute(
+                insert(user_roles).values(user_id=1, role_id=role_id)
+            )
+
+            await conn.execute(
+                delete(Role.__table__).where(Role.id == role_id)
+            )
+
+            assert (await conn.execute(select(user_roles))).all() == []
+    finally:
+        await engine.dispose()
+
+
 # async def test_create_todo(session, user, mock_db_time):
 #     with mock_db_time(model=Todo) as time:
 #         todo = Todo(
@@ -2,6 +2,7 @@ from http import HTTPStatus
 
 import pytest
 
+from fastapi_base.authorization import get_authorization_snapshot
 from fastapi_base.schemas import GroupResponseSchema
 
 
@@ -61,7 +62,8 @@ async def test_read_groups_deve_retornar_lista_de_grupos(
                 'description': 'Grupo de administradores',
             },
             group_schema,
-        ]
+        ],
+        'next_cursor': None,
     }
 
 
@@ -443,3 +445,231 @@ async def test_remove_role_from_group_deve_retornar_404_para_role_nao_no_grupo(
 
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Role not found in group'}
+
+
+@pytest.mark.asyncio
+async def test_permissoes_do_grupo_sao_revalidadas_apos_alterar_membros(
+    client, user, token, admin_token
+):
+    admin_group_id = 1
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = await client.get('/groups/', headers=headers)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+    response = await client.post(
+        f'/groups/{admin_group_id}/users/{user.id}',
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.get('/groups/', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.delete(
+        f'/groups/{admin_group_id}/users/{user.id}',
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.get('/groups/', headers=headers)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_read_groups_deve_paginar_por_cursor(client, group, admin_token):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    response = await client.get('/groups/?limit=1', headers=headers)
+    first_page = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert [g['name'] for g in first_page['groups']] == ['Administradores']
+    assert first_page['next_cursor'] is not None
+
+    response = await client.get(
+        '/groups/',
+        params={'limit': 1, 'cursor': first_page['next_cursor']},
+        headers=headers,
+    )
+    second_page = response.json()
+
+    assert [g['id'] for g in second_page['groups']] == [group.id]
+    assert second_page['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_read_groups_deve_retornar_422_para_cursor_invalido(
+    client, admin_token
+):
+    response = await client.get(
+        '/groups/?cursor=invalido',
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_export_groups_deve_exportar_csv(
+    client, session, admin_token, group, role
+):
+    group.roles.append(role)
+    await session.commit()
+
+    response = await client.get(
+        '/groups/export?format=csv',
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-disposition'] == (
+        'attachment; filename="groups.csv"'
+    )
+    lines = response.text.splitlines()
+    assert lines[0] == 'id,name,description,role_ids'
+    assert f'{group.id},{group.name},{group.description},{role.id}' in lines
+
+
+@pytest.mark.asyncio
+async def test_add_users_to_group_deve_adicionar_em_lote(
+    client, admin_token, admin_user, user, group
+):
+    response = await client.post(
+        f'/groups/{group.id}/users/batch',
+        json={'ids': [user.id, admin_user.id, user.id, 9999]},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'message': '2 user(s) added to group',
+        'count': 2,
+        'missing_ids': [9999],
+    }
+
+    response = await client.post(
+        f'/groups/{group.id}/users/batch',
+        json={'ids': [user.id]},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+    assert response.json()['count'] == 0
+
+    response = await client.request(
+        'DELETE',
+        f'/groups/{group.id}/users/batch',
+        json={'ids': [user.id, 9999]},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'message': '1 user(s) removed from group',
+        'count': 1,
+        'missing_ids': [9999],
+    }
+
+    response = await client.get(
+        f'/groups/{group.id}',
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+    assert [u['id'] for u in response.json()['users']] == [admin_user.id]
+
+
+@pytest.mark.asyncio
+async def test_assign_roles_to_group_deve_invalidar_cache_dos_membros(
+    client, session, admin_token, user, group, role, permission_factory
+):
+    permission = await permission_factory(resource='reports', action='read')
+    role.permissions.append(permission)
+    user.groups.append(group)
+    await session.commit()
+    assert not get_authorization_snapshot(user).allows('reports', 'read')
+
+    response = await client.post(
+        f'/groups/{group.id}/roles/batch',
+        json={'ids': [role.id]},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['count'] == 1
+    await session.refresh(group)
+    assert get_authorization_snapshot(user).allows('reports', 'read')
+
+
+@pytest.mark.asyncio
+async def test_add_users_to_group_inexistente_deve_retornar_404(
+    client, admin_token
+):
+    response = await client.post(
+        '/groups/9999/users/batch',
+        json={'ids': [1]},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Group not found'}
+
+
+@pytest.mark.asyncio
+async def test_add_user_to_group_deve_respeitar_orcamento_de_queries(
+    client, admin_token, group, user, query_budget
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    await client.get(f'/groups/{group.id}', headers=headers)
+
+    with query_budget(7):
+        response = await client.post(
+            f'/groups/{group.id}/users/{user.id}', headers=headers
+        )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_etag_do_grupo_deve_mudar_quando_membros_mudam(
+    client, admin_token, group, user
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    response = await client.get(f'/groups/{group.id}', headers=headers)
+    etag = response.headers['ETag']
+
+    await client.post(f'/groups/{group.id}/users/{user.id}', headers=headers)
+    response = await client.get(
+        f'/groups/{group.id}', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+    assert [member['id'] for member in response.json()['users']] == [user.id]
+
+
+@pytest.mark.asyncio
+async def test_etag_do_grupo_deve_mudar_quando_membro_e_alterado(
+    client, admin_token, group, user
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    await client.post(f'/groups/{group.id}/users/{user.id}', headers=headers)
+    response = await client.get(f'/groups/{group.id}', headers=headers)
+    etag = response.headers['ETag']
+
+    await client.put(
+        f'/users/{user.id}', headers=headers, json={'username': 'renomeado'}
+    )
+    response = await client.get(
+        f'/groups/{group.id}', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+    assert response.json()['users'][0]['username'] == 'renomeado'
+
+    etag = response.headers['ETag']
+    await client.delete(f'/users/{user.id}', headers=headers)
+    response = await client.get(
+        f'/groups/{group.id}', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['users'] == []
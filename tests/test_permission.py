@@ -4,6 +4,7 @@ import pytest
 from sqlalchemy import select
 
 from fastapi_base.models import Permission
+from fastapi_base.routers import permission as permission_routes
 
 
 @pytest.mark.asyncio
@@ -54,6 +55,24 @@ async def test_create_permission_deve_retornar_409_para_permission_existente(
     }
 
 
+@pytest.mark.asyncio
+async def test_create_permission_deve_retornar_422_para_condicao_invalida(
+    client, admin_token
+):
+    response = await client.post(
+        '/permissions/',
+        json={
+            'name': 'Permissão condicional',
+            'resource': 'reports',
+            'action': 'generate',
+            'conditions': {'ip_range': ['não é um ip']},
+        },
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
 @pytest.mark.asyncio
 async def test_read_permissions_deve_retornar_lista_de_permissions(
     client, admin_token, session
@@ -73,6 +92,22 @@ async def test_read_permissions_deve_retornar_lista_de_permissions(
     assert expected_permission_names == returned_names
 
 
+@pytest.mark.asyncio
+async def test_read_permissions_rapido_deve_retornar_mesmo_conteudo(
+    client, admin_token, permission, monkeypatch
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    expected = await client.get('/permissions/', headers=headers)
+
+    monkeypatch.setattr(
+        permission_routes.settings, 'FAST_LIST_RESPONSES', True
+    )
+    response = await client.get('/permissions/', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == expected.json()
+
+
 @pytest.mark.asyncio
 async def test_read_permission_deve_retornar_permission_existente(
     client, admin_token, permission
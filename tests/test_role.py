@@ -59,7 +59,8 @@ async def test_read_roles_deve_retornar_lista_de_roles(
                 'description': 'Função de administrador',
             },
             role_schema,
-        ]
+        ],
+        'next_cursor': None,
     }
 
 
@@ -172,3 +173,38 @@ async def test_update_role_deve_retornar_409_para_nome_existente(
 
     assert response.status_code == HTTPStatus.CONFLICT
     assert response.json() == {'detail': 'Role name already exists'}
+
+
+@pytest.mark.asyncio
+async def test_assign_permissions_to_role_deve_atribuir_e_remover_em_lote(
+    client, admin_token, role, permission_factory
+):
+    first = await permission_factory()
+    second = await permission_factory()
+
+    response = await client.post(
+        f'/roles/{role.id}/permissions/batch',
+        json={'ids': [first.id, second.id, 9999]},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'message': '2 permission(s) assigned to role',
+        'count': 2,
+        'missing_ids': [9999],
+    }
+
+    response = await client.request(
+        'DELETE',
+        f'/roles/{role.id}/permissions/batch',
+        json={'ids': [first.id, second.id]},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'message': '2 permission(s) removed from role',
+        'count': 2,
+        'missing_ids': [],
+    }
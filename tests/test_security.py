@@ -2,11 +2,28 @@ from datetime import datetime
 from http import HTTPStatus
 
 import pytest
-from jwt import decode
+from freezegun import freeze_time
+from jwt import PyJWK, decode, get_unverified_header
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi_base.models import User
+from fastapi_base import security, tokens
+from fastapi_base.authorization import (
+    AuthorizationCache,
+    AuthorizationSnapshot,
+    authorization_cache,
+    commit_authorization_change,
+    compile_permissions,
+    has_permission_sql,
+)
+from fastapi_base.conditions import (
+    compile_conditions,
+    register_condition,
+)
+from fastapi_base.models import User, user_permissions
 from fastapi_base.security import create_access_token, has_permission
+from fastapi_base.tokens import KeyRing, TokenIssuer, VerifiedTokenCache
 
 
 def test_jwt(settings):
@@ -31,6 +48,18 @@ async def test_jwt_invalid_token(client):
     assert response.json() == {'detail': 'Could not validate credentials'}
 
 
+@pytest.mark.asyncio
+async def test_token_emitido_no_futuro_deve_retornar_401(client, user):
+    with freeze_time('2100-01-01 12:00:00'):
+        token = create_access_token({'sub': user.email})
+
+    response = await client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
 @pytest.mark.asyncio
 async def test_superuser_tem_acesso_total(admin_user):
     result = await has_permission(
@@ -183,3 +212,413 @@ async def test_permissao_via_group_concedida(
         is True
     )
     assert await has_permission(user, resource='users', action='list') is False
+
+
+@pytest.mark.asyncio
+async def test_compile_permissions_indexa_por_recurso_e_acao(
+    session, user, permission_factory, group, role
+):
+    p_direct = await permission_factory(resource='users', action='read')
+    p_role = await permission_factory(
+        resource='reports',
+        action='generate',
+        conditions={'ip_range': ['45.85.36.48']},
+    )
+    role.permissions.append(p_role)
+    group.roles.append(role)
+    user.direct_permissions.append(p_direct)
+    user.roles.append(role)
+    user.groups.append(group)
+
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    snapshot = compile_permissions(user)
+
+    assert snapshot.user_id == user.id
+    assert snapshot.unconditional == frozenset({('users', 'read')})
+    assert [
+        c.source for c in snapshot.conditional[('reports', 'generate')]
+    ] == [{'ip_range': ['45.85.36.48']}]
+    assert snapshot.allows('users', 'read') is True
+    assert (
+        snapshot.allows('reports', 'generate', {'ip_address': '45.85.36.48'})
+        is True
+    )
+    assert snapshot.allows('reports', 'generate') is False
+
+
+def test_compile_conditions_aceita_faixas_cidr():
+    compiled = compile_conditions({'ip_range': ['10.0.0.0/8', '45.85.36.48']})
+
+    assert compiled({'ip_address': '10.1.2.3'}) is True
+    assert compiled({'ip_address': '45.85.36.48'}) is True
+    assert compiled({'ip_address': '11.0.0.1'}) is False
+    assert compiled({'ip_address': 'invalido'}) is False
+    assert compiled({}) is False
+
+
+def test_compile_conditions_usa_condicoes_registradas():
+    @register_condition('department')
+    def _compile_department(value):
+        return lambda context: context.get('department') in value
+
+    compiled = compile_conditions({'department': ['finance']})
+
+    assert compiled({'department': 'finance'}) is True
+    assert compiled({'department': 'sales'}) is False
+
+
+def test_compile_conditions_estrito_rejeita_condicoes_invalidas():
+    with pytest.raises(ValueError, match='Unknown condition'):
+        compile_conditions({'weekday': ['mon']}, strict=True)
+    with pytest.raises(ValueError, match='Invalid value'):
+        compile_conditions({'time_between': ['9h']}, strict=True)
+
+    assert compile_conditions({'time_between': ['9h']})({}) is False
+    assert compile_conditions({'weekday': ['mon']})({}) is True
+
+
+def test_authorization_cache_descarta_entradas_expiradas_e_antigas():
+    cache = AuthorizationCache(max_size=2, ttl=60)
+
+    with freeze_time('2025-07-01 12:00:00') as frozen_time:
+        for user_id in (1, 2, 3):
+            cache.set(AuthorizationSnapshot(user_id=user_id))
+
+        assert cache.get(1) is None
+        assert cache.get(2) is not None
+
+        frozen_time.tick(61)
+
+        assert cache.get(2) is None
+        assert cache.get(3) is None
+        assert len(cache) == 0
+
+
+def test_token_cache_descarta_tokens_expirados_e_antigos():
+    cache = VerifiedTokenCache(max_size=2)
+
+    with freeze_time('2025-07-01 12:00:00') as frozen_time:
+        now = int(datetime.now().timestamp())
+        for token in ('a', 'b', 'c'):
+            cache.set(token, {'sub': token, 'exp': now + 60})
+        cache.set('sem-exp', {'sub': 'x'})
+
+        assert cache.get('a') is None
+        assert cache.get('b') == {'sub': 'b', 'exp': now + 60}
+
+        frozen_time.tick(60)
+
+        assert cache.get('b') is None
+        assert cache.get('c') is None
+        assert len(cache) == 0
+        assert cache.stats() == {'entries': 0, 'hits': 1, 'misses': 3}
+
+
+def test_token_issuer_usa_claims_inteiros_configuraveis():
+    key_ring = KeyRing('HS256', secret='secret')
+    issuer = TokenIssuer(key_ring, lifetime_seconds=60)
+
+    with freeze_time('2025-07-01 12:00:00'):
+        now = int(datetime.now().timestamp())
+        claims = issuer.verify(issuer.issue({'sub': 'a'}))
+
+        assert claims['exp'] == now + 60
+        assert claims['iat'] == now
+        assert 'nbf' not in claims
+        assert (
+            issuer.verify(issuer.issue({'sub': 'a'}))['jti'] != (claims['jti'])
+        )
+
+        issuer = TokenIssuer(
+            key_ring,
+            lifetime_seconds=60,
+            include_iat=False,
+            include_nbf=True,
+            include_jti=False,
+        )
+        claims = issuer.verify(issuer.issue({'sub': 'a'}))
+
+    assert claims == {'sub': 'a', 'exp': now + 60, 'nbf': now}
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_nao_verifica_token_repetido(
+    client, user, token, monkeypatch
+):
+    calls = []
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(tokens, 'decode', counting_decode)
+    headers = {'Authorization': f'Bearer {token}'}
+    for _ in range(3):
+        response = await client.post('/auth/refresh_token', headers=headers)
+        assert response.status_code == HTTPStatus.OK
+
+    assert calls == [token]
+
+
+@pytest.mark.asyncio
+async def test_has_permission_sql_considera_usuario_role_e_grupo(
+    session, user, permission_factory, group, role
+):
+    p_direct = await permission_factory(resource='users', action='read')
+    p_group = await permission_factory(resource='reports', action='generate')
+    p_conditional = await permission_factory(
+        resource='reports',
+        action='export',
+        conditions={'ip_range': ['45.85.36.48']},
+    )
+    role.permissions.extend([p_group, p_conditional])
+    group.roles.append(role)
+    user.direct_permissions.append(p_direct)
+    user.groups.append(group)
+
+    session.add(user)
+    await session.commit()
+
+    assert await has_permission_sql(session, user, 'users', 'read') is True
+    assert (
+        await has_permission_sql(session, user, 'reports', 'generate') is True
+    )
+    assert await has_permission_sql(session, user, 'users', 'delete') is False
+    assert (
+        await has_permission_sql(
+            session,
+            user,
+            'reports',
+            'export',
+            {'ip_address': '45.85.36.48'},
+        )
+        is True
+    )
+    assert (
+        await has_permission_sql(
+            session, user, 'reports', 'export', {'ip_address': '10.0.0.1'}
+        )
+        is False
+    )
+
+
+@pytest.mark.asyncio
+async def test_require_permission_com_motor_sql(
+    client, session, user, token, permission_factory, monkeypatch
+):
+    monkeypatch.setattr(security.settings, 'AUTHORIZATION_ENGINE', 'sql')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = await client.get('/users/', headers=headers)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+    p_list = await permission_factory(resource='users', action='list')
+    await session.execute(
+        insert(user_permissions).values(
+            user_id=user.id, permission_id=p_list.id
+        )
+    )
+    await session.commit()
+
+    response = await client.get('/users/', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_motor_de_autorizacao_invalido_e_rejeitado(settings):
+    with pytest.raises(ValidationError):
+        settings.model_validate({
+            **settings.model_dump(),
+            'AUTHORIZATION_ENGINE': 'sqll',
+        })
+
+
+@pytest.mark.asyncio
+async def test_motor_sql_nao_carrega_grafo_de_permissoes_do_usuario(
+    client, session, user, token, permission_factory, monkeypatch, query_budget
+):
+    monkeypatch.setattr(security.settings, 'AUTHORIZATION_ENGINE', 'sql')
+    permission = await permission_factory(
+        resource='permissions', action='read'
+    )
+    user.direct_permissions.append(permission)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # User, permission check, ETag and permission: no relationship loads
+    with query_budget(4):
+        response = await client.get(
+            f'/permissions/{permission.id}', headers=headers
+        )
+    assert response.status_code == HTTPStatus.OK
+
+    with query_budget(1):
+        response = await client.post('/auth/refresh_token', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_snapshot_em_cache_nao_carrega_grafo_de_permissoes(
+    client, session, user, token, permission_factory, query_budget
+):
+    permission = await permission_factory(
+        resource='permissions', action='read'
+    )
+    user.direct_permissions.append(permission)
+    await commit_authorization_change(session, [user.id])
+    headers = {'Authorization': f'Bearer {token}'}
+    await client.get(f'/permissions/{permission.id}', headers=headers)
+
+    # User, ETag and permission: the snapshot comes from the cache
+    with query_budget(3):
+        response = await client.get(
+            f'/permissions/{permission.id}', headers=headers
+        )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_snapshot_em_cache_e_recusado_apos_mudanca_em_outro_worker(
+    client, session, user, token, permission_factory
+):
+    permission = await permission_factory(
+        resource='permissions', action='read'
+    )
+    user.direct_permissions.append(permission)
+    await commit_authorization_change(session, [user.id])
+    headers = {'Authorization': f'Bearer {token}'}
+    response = await client.get(
+        f'/permissions/{permission.id}', headers=headers
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert authorization_cache.get(user.id) is not None
+
+    # What commit_authorization_change does on another worker, whose
+    # invalidation never reaches this process's cache
+    await session.execute(
+        delete(user_permissions).where(user_permissions.c.user_id == user.id)
+    )
+    await session.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(authorization_version=User.authorization_version + 1)
+    )
+    await session.commit()
+
+    response = await client.get(
+        f'/permissions/{permission.id}', headers=headers
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def _write_rsa_key(path, public_only=False):
+    serialization = pytest.importorskip(
+        'cryptography.hazmat.primitives.serialization'
+    )
+    rsa = pytest.importorskip('cryptography.hazmat.primitives.asymmetric.rsa')
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if public_only:
+        path.write_bytes(
+            key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        )
+    else:
+        path.write_bytes(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+
+
+@pytest.fixture
+def rsa_key_ring(tmp_path):
+    _write_rsa_key(tmp_path / 'k1.pem')
+    key_ring = security.key_ring
+    saved = key_ring.algorithm, key_ring.keys_dir, key_ring.active_kid
+    key_ring.algorithm, key_ring.keys_dir = 'RS256', str(tmp_path)
+    security.reload_signing_keys()
+    yield key_ring
+    key_ring.algorithm, key_ring.keys_dir, key_ring.active_kid = saved
+    security.reload_signing_keys()
+
+
+@pytest.mark.asyncio
+async def test_token_rs256_deve_ser_verificavel_pelo_jwks(
+    client, user, rsa_key_ring
+):
+    token = create_access_token({'sub': user.email})
+    assert get_unverified_header(token) == {
+        'alg': 'RS256',
+        'kid': 'k1',
+        'typ': 'JWT',
+    }
+
+    response = await client.get('/.well-known/jwks.json')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'max-age' in response.headers['Cache-Control']
+    (jwk,) = response.json()['keys']
+    assert jwk['kid'] == 'k1'
+    claims = decode(token, PyJWK(jwk).key, algorithms=['RS256'])
+    assert claims['sub'] == user.email
+
+
+@pytest.mark.asyncio
+async def test_rotacao_de_chaves_publica_antes_de_ativar_a_chave_nova(
+    client, user, rsa_key_ring, tmp_path, monkeypatch
+):
+    old_token = create_access_token({'sub': user.email})
+    _write_rsa_key(tmp_path / 'k2.pem')
+
+    # Two private keys and no active kid: the loaded keys stay in use
+    with pytest.raises(RuntimeError):
+        security.key_watcher.check()
+    assert rsa_key_ring.signing_key.kid == 'k1'
+
+    monkeypatch.setenv('JWT_ACTIVE_KEY_ID', 'k1')
+    assert security.key_watcher.check()
+    assert not security.key_watcher.check()
+
+    response = await client.get('/.well-known/jwks.json')
+    assert [jwk['kid'] for jwk in response.json()['keys']] == ['k1', 'k2']
+    token = create_access_token({'sub': user.email})
+    assert get_unverified_header(token)['kid'] == 'k1'
+
+    monkeypatch.setenv('JWT_ACTIVE_KEY_ID', 'k2')
+    assert security.key_watcher.check()
+
+    new_token = create_access_token({'sub': user.email})
+    assert get_unverified_header(new_token)['kid'] == 'k2'
+    for token in (old_token, new_token):
+        response = await client.post(
+            '/auth/refresh_token',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    (tmp_path / 'k1.pem').unlink()
+    assert security.key_watcher.check()
+    response = await client.post(
+        '/auth/refresh_token',
+        headers={'Authorization': f'Bearer {old_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_key_ring_aceita_chave_publica_aposentada(tmp_path):
+    _write_rsa_key(tmp_path / 'k1.pem', public_only=True)
+    _write_rsa_key(tmp_path / 'k2.pem')
+
+    key_ring = security.KeyRing('RS256', keys_dir=str(tmp_path))
+
+    assert key_ring.signing_key.kid == 'k2'
+    assert [jwk['kid'] for jwk in key_ring.jwks()['keys']] == ['k1', 'k2']
+    with pytest.raises(RuntimeError):
+        security.KeyRing('RS256', keys_dir=str(tmp_path), active_kid='k1')
@@ -1,9 +1,20 @@
+import asyncio
+import json
+from datetime import datetime
 from http import HTTPStatus
 
 import pytest
+from sqlalchemy import event
 
+from fastapi_base.app import app
+from fastapi_base.models import User
+from fastapi_base.routers import users as users_routes
 from fastapi_base.schemas import UserResponseSchema
-from fastapi_base.security import create_access_token
+from fastapi_base.security import (
+    bulk_hash_pool,
+    create_access_token,
+    password_hash_pool,
+)
 
 
 @pytest.mark.asyncio
@@ -224,7 +235,27 @@ async def test_read_users_deve_retornar_lista_de_usuarios(
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {'users': [user_schema], 'next_cursor': None}
+
+
+@pytest.mark.asyncio
+async def test_list_users_rapido_deve_retornar_mesmo_conteudo(
+    client, admin_user, user, admin_token, monkeypatch, query_budget
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    url = '/users/?limit=1'
+    expected = await client.get(url, headers=headers)
+    cursor = expected.json()['next_cursor']
+    expected_next = await client.get(f'{url}&cursor={cursor}', headers=headers)
+
+    monkeypatch.setattr(users_routes.settings, 'FAST_LIST_RESPONSES', True)
+    with query_budget(5):
+        response = await client.get(url, headers=headers)
+    response_next = await client.get(f'{url}&cursor={cursor}', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == expected.json()
+    assert response_next.json() == expected_next.json()
 
 
 @pytest.mark.asyncio
@@ -247,6 +278,31 @@ async def test_read_user_deve_retornar_usuario_existente(
     }
 
 
+@pytest.mark.asyncio
+async def test_read_user_deve_retornar_304_quando_etag_nao_mudou(
+    client, admin_user, admin_token
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    response = await client.get(f'/users/{admin_user.id}', headers=headers)
+    etag = response.headers['ETag']
+    assert etag.startswith(f'W/"{admin_user.id}-')
+
+    response = await client.get(
+        f'/users/{admin_user.id}',
+        headers={**headers, 'If-None-Match': etag},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+    response = await client.get(
+        f'/users/{admin_user.id}',
+        headers={**headers, 'If-None-Match': 'W/"outra-versao"'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
 @pytest.mark.asyncio
 async def test_read_user_deve_retornar_404_para_usuario_inexistente(
     client, admin_user, admin_token
@@ -260,6 +316,55 @@ async def test_read_user_deve_retornar_404_para_usuario_inexistente(
     assert response.json() == {'detail': 'User not found'}
 
 
+@pytest.mark.asyncio
+async def test_etag_do_usuario_deve_mudar_quando_grupo_e_renomeado(
+    client, admin_token, group, user
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    await client.post(f'/groups/{group.id}/users/{user.id}', headers=headers)
+    response = await client.get(f'/users/{user.id}', headers=headers)
+    etag = response.headers['ETag']
+
+    await client.put(
+        f'/groups/{group.id}',
+        headers=headers,
+        json={'name': 'Grupo renomeado', 'description': None},
+    )
+    response = await client.get(
+        f'/users/{user.id}', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+
+
+@pytest.mark.asyncio
+async def test_etag_do_usuario_deve_mudar_em_escritas_no_mesmo_segundo(
+    client, admin_token, user
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    etags = []
+
+    def same_second(mapper, connection, target):
+        target.updated_at = datetime(2026, 1, 1, 12)
+
+    event.listen(User, 'before_update', same_second)
+    try:
+        for username in ('primeiro', 'segundo'):
+            await client.put(
+                f'/users/{user.id}',
+                headers=headers,
+                json={'username': username},
+            )
+            response = await client.get(f'/users/{user.id}', headers=headers)
+            etags.append(response.headers['ETag'])
+    finally:
+        event.remove(User, 'before_update', same_second)
+
+    assert etags[0] != etags[1]
+    assert response.json()['username'] == 'segundo'
+
+
 @pytest.mark.asyncio
 async def test_update_user_deve_atualizar_usuario_existente(
     client, admin_user, admin_token
@@ -387,3 +492,269 @@ async def test_user_inactive_deve_retornar_403(
 
     assert response.status_code == HTTPStatus.FORBIDDEN
     assert response.json() == {'detail': 'User is not active'}
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_users_deve_importar_ndjson_e_retornar_resultados(
+    client, admin_token, user
+):
+    rows = [
+        {
+            'username': 'bulk1',
+            'email': 'bulk1@example.com',
+            'password': 'Secret@123',
+        },
+        {'username': 'bulk2', 'email': 'bulk2@example.com', 'password': '123'},
+        {
+            'username': user.username,
+            'email': 'x@example.com',
+            'password': 'Secret@123',
+        },
+        {
+            'username': 'bulk1',
+            'email': 'other@example.com',
+            'password': 'Secret@123',
+        },
+    ]
+    body = '\n'.join(json.dumps(row) for row in rows) + '\n{invalid\n'
+
+    response = await client.post(
+        '/users/bulk',
+        content=body,
+        headers={
+            'Authorization': f'Bearer {admin_token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r['line'], r['status']) for r in results] == [
+        (1, 'created'),
+        (2, 'invalid'),
+        (3, 'conflict'),
+        (4, 'conflict'),
+        (5, 'invalid'),
+    ]
+    assert results[1]['errors'][0]['loc'] == ['password']
+
+    response = await client.get(
+        f'/users/{results[0]["id"]}',
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+    assert response.json()['username'] == 'bulk1'
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_users_deve_importar_csv(client, admin_token):
+    body = (
+        'username,email,password\r\n'
+        'csv1,csv1@example.com,Secret@123\r\n'
+        'csv2,csv2@example.com\r\n'
+    )
+
+    response = await client.post(
+        '/users/bulk',
+        content=body,
+        headers={
+            'Authorization': f'Bearer {admin_token}',
+            'Content-Type': 'text/csv',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r['line'], r['status']) for r in results] == [
+        (2, 'created'),
+        (3, 'invalid'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_users_rejeita_campos_maiores_que_as_colunas(
+    client, admin_token
+):
+    rows = [
+        {
+            'username': 'u' * 51,
+            'email': 'longo@example.com',
+            'password': 'Secret@123',
+        },
+        {
+            'username': 'email_longo',
+            'email': 'e' * 95 + '@example.com',
+            'password': 'Secret@123',
+        },
+    ]
+
+    response = await client.post(
+        '/users/bulk',
+        content='\n'.join(json.dumps(row) for row in rows),
+        headers={
+            'Authorization': f'Bearer {admin_token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+    )
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r['status'], r['errors'][0]['loc']) for r in results] == [
+        ('invalid', ['username']),
+        ('invalid', ['email']),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_users_reporta_erro_do_banco_e_segue_importando(
+    client, admin_token, monkeypatch
+):
+    monkeypatch.setattr(users_routes.settings, 'BULK_IMPORT_CHUNK_SIZE', 1)
+    get_password_hash = users_routes.get_password_hash
+    # A NULL password makes the insert fail with something other than a
+    # unique violation
+    monkeypatch.setattr(
+        users_routes,
+        'get_password_hash',
+        lambda password: (
+            None if password == 'Falha@123' else get_password_hash(password)
+        ),
+    )
+    rows = [
+        {
+            'username': 'falha',
+            'email': 'f@example.com',
+            'password': 'Falha@123',
+        },
+        {
+            'username': 'ok',
+            'email': 'ok@example.com',
+            'password': 'Secret@123',
+        },
+    ]
+
+    response = await client.post(
+        '/users/bulk',
+        content='\n'.join(json.dumps(row) for row in rows),
+        headers={
+            'Authorization': f'Bearer {admin_token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r['line'], r['status']) for r in results] == [
+        (1, 'error'),
+        (2, 'created'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_users_envia_resultados_antes_do_fim_do_corpo(
+    client, admin_token, monkeypatch
+):
+    monkeypatch.setattr(users_routes.settings, 'BULK_IMPORT_CHUNK_SIZE', 1)
+    body = [
+        json.dumps({
+            'username': f'duplex{i}',
+            'email': f'duplex{i}@example.com',
+            'password': 'Secret@123',
+        }).encode()
+        + b'\n'
+        for i in range(2)
+    ]
+    first_result = asyncio.Event()
+    sent = []
+
+    async def receive():
+        chunk = body.pop(0)
+        if not body:
+            # The rest of the body only arrives after the first result
+            await asyncio.wait_for(first_result.wait(), timeout=5)
+        return {'type': 'http.request', 'body': chunk, 'more_body': bool(body)}
+
+    async def send(message):
+        if message['type'] == 'http.response.body' and message.get('body'):
+            sent.append(json.loads(message['body']))
+            first_result.set()
+
+    logins_hashed = password_hash_pool.completed
+    bulk_hashed = bulk_hash_pool.completed
+    await app(
+        {
+            'type': 'http',
+            'asgi': {'version': '3.0', 'spec_version': '2.3'},
+            'http_version': '1.1',
+            'method': 'POST',
+            'scheme': 'http',
+            'path': '/users/bulk',
+            'raw_path': b'/users/bulk',
+            'root_path': '',
+            'query_string': b'',
+            'headers': [
+                (b'authorization', f'Bearer {admin_token}'.encode()),
+                (b'content-type', b'application/x-ndjson'),
+            ],
+            'client': ('127.0.0.1', 5000),
+            'server': ('test', 80),
+        },
+        receive,
+        send,
+    )
+
+    assert [(r['line'], r['status']) for r in sent] == [
+        (1, 'created'),
+        (2, 'created'),
+    ]
+    assert password_hash_pool.completed == logins_hashed
+    assert bulk_hash_pool.completed == bulk_hashed + len(sent)
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_users_deve_retornar_415_para_formato_invalido(
+    client, admin_token
+):
+    response = await client.post(
+        '/users/bulk',
+        json=[],
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+
+@pytest.mark.asyncio
+async def test_export_users_deve_exportar_usuarios_com_papeis_e_grupos(
+    client, session, admin_user, admin_token, user, role, group
+):
+    user.roles.append(role)
+    user.groups.append(group)
+    await session.commit()
+
+    response = await client.get(
+        '/users/export',
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    rows = {
+        row['id']: row for row in map(json.loads, response.text.splitlines())
+    }
+    assert set(rows) == {admin_user.id, user.id}
+    assert rows[user.id]['username'] == user.username
+    assert rows[user.id]['role_ids'] == [role.id]
+    assert rows[user.id]['group_ids'] == [group.id]
+    assert 'password' not in rows[user.id]
+
+
+@pytest.mark.asyncio
+async def test_list_users_deve_respeitar_orcamento_de_queries(
+    client, admin_token, user, query_budget
+):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    await client.get('/users/', headers=headers)
+
+    with query_budget(8):
+        response = await client.get('/users/', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
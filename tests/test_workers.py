@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from fastapi_base.security import (
+    get_password_hash_async,
+    verify_password_async,
+)
+from fastapi_base.workers import WorkerPool
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_respeita_limite_de_concorrencia():
+    pool = WorkerPool(max_workers=2)
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def work(value):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return value
+
+    results = await asyncio.gather(*(pool.run(work, i) for i in range(6)))
+    pool.shutdown()
+
+    assert results == list(range(6))
+    assert peak <= pool.max_workers
+    assert pool.stats() == {
+        'kind': 'thread',
+        'max_workers': 2,
+        'queued': 0,
+        'running': 0,
+        'completed': 6,
+    }
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_informa_chamadas_em_fila():
+    pool = WorkerPool(max_workers=1)
+    release = threading.Event()
+
+    tasks = [asyncio.create_task(pool.run(release.wait)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+
+    stats = pool.stats()
+    assert stats['running'] == 1
+    assert stats['queued'] == len(tasks) - 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    pool.shutdown()
+
+
+def test_worker_pool_tipo_invalido():
+    with pytest.raises(ValueError, match='Unknown worker pool kind'):
+        WorkerPool(kind='fiber')
+
+
+@pytest.mark.asyncio
+async def test_hash_de_senha_no_pool():
+    hashed = await get_password_hash_async('Secret@123')
+
+    assert await verify_password_async('Secret@123', hashed) is True
+    assert await verify_password_async('wrong', hashed) is False